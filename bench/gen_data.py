@@ -0,0 +1,186 @@
+""" Synthetic data generator: a fresh database on the current schema, filled to
+configurable volumes so pages and queries can be measured at scale.
+
+    python bench/gen_data.py big.db --sales 1000000 [--items 5000] [--customers 10000] [--seed 1]
+
+Rows go in with the derived-table triggers dropped, then the triggers are
+re-created and item_stock / customer_balances / daily_summary rebuilt, so the
+result is the same as entering everything through the app, only much faster.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THREADS = ["Thread_3_Big", "Thread_3_Small", "Thread_4_Big", "Thread_4_Small", "Thread_6_Big", "Thread_6_Small",
+           "Thread_8_Big", "Thread_8_Small", "Thread_Thiri", "Thread_Thiri Rs.5", "Cone_40s", "Cone_60s", "Zari_Gold", "Zari_Silver"]
+COLORS = ["White", "Black", "Red", "Maroon", "Yellow", "Green", "Parrot Green", "Blue", "Navy", "Pink", "Rose", "Orange",
+          "Violet", "Brown", "Grey", "Cream", "Sandal", "Sky Blue", "Magenta", "Gold"]
+AREAS = ["Chrompet", "Pallavaram", "Tambaram", "Chitlapakkam", "Selaiyur", "Medavakkam", "Guindy", "T Nagar", "Velachery", "Porur"]
+STAFF = ["Vinoth", "Ranjitha", "Kavitha", "Selvi", "Murugan", "Lakshmi", "Priya", "Anand"]
+VENDORS = [("Saravanan", "9344477799"), ("Sri Murugan Traders", "9840011223"), ("Kumar Yarns", "9444012345"), ("Balaji Threads", "9003322110")]
+CATEGORIES = ["Parcel Service", "Load Auto", "Packing Cover", "Thread Machine", "Sealing Machine", "Weight Machine", "Rent", "Electricity", "Transport", "Misc"]
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("out", help="database file to create (must not exist)")
+    ap.add_argument("--items", type=int, default=5000)
+    ap.add_argument("--customers", type=int, default=10000)
+    ap.add_argument("--sales", type=int, default=1000000)
+    ap.add_argument("--lines", type=float, default=2.0, help="average sale_items per sale")
+    ap.add_argument("--walkin", type=float, default=0.15, help="share of sales without a customer")
+    ap.add_argument("--payments", type=int, help="extra due collections (default: sales / 10)")
+    ap.add_argument("--expenses", type=int, default=20000)
+    ap.add_argument("--staff-work", type=int, default=20000)
+    ap.add_argument("--purchases", type=int, default=5000)
+    ap.add_argument("--restocks", type=int, help="stock_logs top-ups (default: items * 20)")
+    ap.add_argument("--days", type=int, default=730, help="history length, ending today")
+    ap.add_argument("--seed", type=int, default=1)
+    return ap.parse_args(argv)
+
+def day_picker(rng, days):
+    """ Random ISO dates in the last `days` days, weighted towards recent ones (the shop grows). """
+    start = date.today() - timedelta(days=days - 1)
+    iso = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    weights = [1 + i / days for i in range(days)]
+    cum = [0.0] * days; acc = 0.0
+    for i, w in enumerate(weights): acc += w; cum[i] = acc
+    return lambda k: sorted(rng.choices(iso, cum_weights=cum, k=k))
+
+def line_counts(rng, avg):
+    """ Lines per sale: mostly one or two, a long tail up to eight, mean ~avg. """
+    ks = list(range(1, 9)); p = max(0.05, min(0.95, 1 / avg))
+    w = [p * (1 - p) ** (k - 1) for k in ks]
+    return lambda n: rng.choices(ks, weights=w, k=n)
+
+def generate(conn, a, log=print):
+    rng = random.Random(a.seed)
+    pick_days = day_picker(rng, a.days)
+    c = conn.cursor()
+    t0 = time.perf_counter()
+    def done(what, n): log(f"  {what:<18}{n:>10,} rows  {time.perf_counter() - t0:7.1f} s")
+
+    c.executemany("INSERT OR IGNORE INTO master_names (name) VALUES (?)", [(t,) for t in THREADS])
+    items = []
+    for i in range(a.items):
+        name = THREADS[i % len(THREADS)]; color = COLORS[(i // len(THREADS)) % len(COLORS)]
+        if i >= len(THREADS) * len(COLORS): color = f"{color} {i // (len(THREADS) * len(COLORS)) + 1}"
+        cost = round(rng.uniform(8, 60), 2)
+        items.append((i + 1, name, color, rng.choice([0, 0, 0, 10, 25]), cost, round(cost * rng.uniform(1.3, 2.0), 2)))
+    c.executemany("INSERT INTO items (id, name, color, opening_stock, cost_price, sell_price) VALUES (?,?,?,?,?,?)", items)
+    done("items", len(items))
+
+    # Popular items and regular customers take most of the volume (Zipf-like weights)
+    item_cw = []; acc = 0.0
+    for i in range(a.items): acc += 1 / (i + 1) ** 0.8; item_cw.append(acc)
+    cust_cw = []; acc = 0.0
+    for i in range(a.customers): acc += 1 / (i + 1) ** 0.6; cust_cw.append(acc)
+    item_ids = list(range(1, a.items + 1)); cust_ids = list(range(1, a.customers + 1))
+
+    c.executemany("INSERT INTO customers (id, name, phone, address, opening_due) VALUES (?,?,?,?,?)",
+                  ((i, f"Customer {i} - {rng.choice(AREAS)}", f"9{rng.randrange(10**8, 10**9)}", f"{rng.randint(1, 200)}, Main Road, {rng.choice(AREAS)}",
+                    rng.choice([0.0] * 9 + [round(rng.uniform(100, 5000), 2)])) for i in cust_ids))
+    done("customers", a.customers)
+
+    restocks = a.restocks if a.restocks is not None else a.items * 20
+    first = date.today() - timedelta(days=a.days - 1)
+    logs = [(first.isoformat(), i, rng.randint(50, 500), "New Item") for i in item_ids]
+    logs += [(d, rng.choices(item_ids, cum_weights=item_cw)[0], rng.randint(20, 400), "Updated Stock") for d in pick_days(restocks)]
+    logs.sort()
+    c.executemany("INSERT INTO stock_logs (date, item_id, qty_added, notes) VALUES (?,?,?,?)", logs)
+    done("stock_logs", len(logs)); del logs
+
+    # Sales in date order (ids follow entry order, as in the app), written in batches
+    costs = {it[0]: (it[4], it[5]) for it in items}
+    n_lines = line_counts(rng, a.lines)
+    batch = 50000; sid = 0; line_total = 0; pay_total = 0
+    for off in range(0, a.sales, batch):
+        n = min(batch, a.sales - off)
+        days = pick_days(n); counts = n_lines(n)
+        sales, lines, pays = [], [], []
+        for d, k in zip(days, counts):
+            sid += 1
+            cust = None if rng.random() < a.walkin else rng.choices(cust_ids, cum_weights=cust_cw)[0]
+            grand = 0.0
+            for iid in rng.choices(item_ids, cum_weights=item_cw, k=k):
+                cost, sell = costs[iid]; qty = rng.randint(1, 12); price = round(sell * rng.uniform(0.9, 1.05), 2)
+                lines.append((sid, iid, qty, price, cost)); grand += qty * price
+            grand = round(grand, 2); taxable = round(grand / 1.05, 2); tax = round((grand - taxable) / 2, 2)
+            r = rng.random()
+            paid = grand if (cust is None or r < 0.75) else (round(grand * rng.uniform(0.2, 0.8), 2) if r < 0.92 else 0.0)
+            sales.append((sid, d, cust, taxable, 2.5, 2.5, tax, tax, grand, paid, "", "" if cust else f"9{rng.randrange(10**8, 10**9)}"))
+            if paid > 0: pays.append((d, cust, sid, paid, "Sale"))
+        c.executemany("INSERT INTO sales (id, date, customer_id, sub_total, cgst_percent, sgst_percent, cgst_amount, sgst_amount, grand_total, paid_amount, notes, walkin_phone) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", sales)
+        c.executemany("INSERT INTO sale_items (sale_id, item_id, qty, price_per_unit, cost_per_unit) VALUES (?,?,?,?,?)", lines)
+        c.executemany("INSERT INTO payments (date, customer_id, sale_id, amount, note) VALUES (?,?,?,?,?)", pays)
+        line_total += len(lines); pay_total += len(pays)
+    done("sales", a.sales); done("sale_items", line_total)
+
+    extra = a.payments if a.payments is not None else a.sales // 10
+    c.executemany("INSERT INTO payments (date, customer_id, sale_id, amount, note) VALUES (?,?,?,?,?)",
+                  ((d, rng.choices(cust_ids, cum_weights=cust_cw)[0], None, round(rng.uniform(100, 3000), 2), "Due collection") for d in pick_days(extra)))
+    done("payments", pay_total + extra)
+
+    c.executemany("INSERT INTO expenses (date, category, description, amount) VALUES (?,?,?,?)",
+                  ((d, cat, f"{cat} charges", round(rng.uniform(50, 2500), 2)) for d, cat in zip(pick_days(a.expenses), rng.choices(CATEGORIES, k=a.expenses))))
+    done("expenses", a.expenses)
+
+    # Staff work: a few packed items per entry plus its salary expense, as the Staff Work page saves it
+    works, work_items, salaries = [], [], []
+    for wid, d in enumerate(pick_days(a.staff_work), 1):
+        nm = rng.choice(STAFF); sal = 0.0; kg = 0.0
+        for iid in rng.sample(item_ids[:200], rng.randint(1, 4)):
+            grams = rng.choice([40.0, 80.0, 170.0, 330.0]); qty = rng.randint(5, 60); rate = rng.choice([0.0, 0.5, 1.0, 1.5])
+            sal += qty * rate; kg += qty * grams / 1000
+            work_items.append((wid, iid, f"{items[iid - 1][1]} ({items[iid - 1][2]})", grams, qty, rate, qty * rate))
+        works.append((wid, d, nm, round(kg * rng.uniform(1.0, 1.1), 3), sal, ""))
+        salaries.append((d, "Salary", f"Salary: {nm}", sal, wid))
+    c.executemany("INSERT INTO staff_work (id, date, staff_name, kg_provided, total_salary, notes) VALUES (?,?,?,?,?,?)", works)
+    c.executemany("INSERT INTO staff_work_items (work_id, item_id, item_name, grams, qty_produced, rate, amount) VALUES (?,?,?,?,?,?,?)", work_items)
+    c.executemany("INSERT INTO expenses (date, category, description, amount, staff_entry_id) VALUES (?,?,?,?,?)", salaries)
+    done("staff_work", len(works)); done("staff_work_items", len(work_items))
+    del works, work_items, salaries
+
+    pur = []
+    for d in pick_days(a.purchases):
+        bags = float(rng.randint(1, 6)); kgb = rng.choice([50.0, 60.0]); rate = round(rng.uniform(120, 180), 2)
+        vn, vc = rng.choice(VENDORS); gst = rng.random() < 0.3
+        pur.append((d, "Thread Bag", bags, kgb, bags * kgb, rate, bags * kgb * rate, vn, vc, int(gst), 2.5 if gst else 0.0, 2.5 if gst else 0.0))
+    c.executemany("""INSERT INTO purchases (date, description, bags, kg_per_bag, total_kg, price_per_kg, total_amount,
+                     vendor_name, vendor_contact, is_gst, cgst_percent, sgst_percent) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""", pur)
+    done("purchases", len(pur))
+
+def main(argv=None):
+    a = parse_args(argv)
+    if os.path.exists(a.out): sys.exit(f"{a.out} already exists; pick a new path")
+    os.environ['VSR_DB'] = os.path.abspath(a.out)
+    sys.path.insert(0, ROOT)
+    from vsr_db import get_conn, init_db, rebuild_customer_balances, rebuild_daily_summary, rebuild_item_stock, update_setting
+
+    init_db()  # schema, migrations, default settings and the admin user
+    update_setting("cgst_percent", 2.5); update_setting("sgst_percent", 2.5)
+    update_setting("expense_categories", ",".join(CATEGORIES))
+    conn = get_conn()
+    conn.execute("PRAGMA synchronous=OFF")
+    print(f"generating {a.out}")
+    t0 = time.perf_counter()
+    conn.execute("BEGIN")
+    try:
+        triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger'").fetchall()
+        for t in triggers: conn.execute(f"DROP TRIGGER {t['name']}")
+        generate(conn, a)
+        for t in triggers: conn.execute(t['sql'])
+        c = conn.cursor()
+        rebuild_item_stock(c); rebuild_customer_balances(c); rebuild_daily_summary(c)
+        conn.commit()
+    except BaseException:
+        conn.rollback(); raise
+    conn.execute("ANALYZE"); conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    print(f"done in {time.perf_counter() - t0:.1f} s, {os.path.getsize(a.out) / 2**20:,.0f} MB")
+
+if __name__ == "__main__":
+    main()
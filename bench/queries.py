@@ -0,0 +1,152 @@
+""" Query benchmark: runs each page's query set against a database and reports
+p50/p95 latency and the number of SQL statements per run.
+
+    python bench/gen_data.py /tmp/big.db --sales 1000000
+    python bench/queries.py --db /tmp/big.db --save bench/base.json
+    ... change something ...
+    python bench/queries.py --db /tmp/big.db --compare bench/base.json
+
+The sets call the same functions the pages do (dashboard_data, grid_page,
+report_sql, ...) on a scratch copy of the database, outside Streamlit and with
+the read cache bypassed, so the numbers are pure query cost. --compare exits
+non-zero when a set's p50 regresses past --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SLOW_RUNS = 3  # cap for sets that rewrite a whole DB file (backup)
+
+def query_sets(d1, d2, cid, tmp):
+    """ name -> (callable, slow). Imports happen here, after VSR_DB is set. """
+    from vsr_db import compute_pnl, get_customer_dues, run_query
+    from vsr_ui import grid_page
+    from vsr_pages.dashboard import dashboard_data
+    from vsr_pages.inventory import RECENT_LOGS, inventory_metrics, stock_rows
+    from vsr_pages.reports import report_sql
+    from vsr_pages.sales import HISTORY_SQL, with_items
+    from vsr_backup import filtered_backup
+
+    def history(where=(), params=()):
+        _, rows, _ = grid_page(HISTORY_SQL, params, list(where), "id", True, None, 50)
+        return with_items([dict(r) for r in rows]) if rows else rows
+
+    def inventory():
+        inventory_metrics(); stock_rows(""); run_query(RECENT_LOGS, fetch=True)
+
+    def backup():
+        dest = os.path.join(tmp, "filtered.db")
+        filtered_backup(dest, d1, d2); os.remove(dest)
+
+    sets = {
+        "Dashboard": (lambda: dashboard_data(None, None, None), False),
+        "Dashboard (range)": (lambda: dashboard_data(d1, d2, None), False),
+        "Dashboard (customer)": (lambda: dashboard_data(None, None, cid), False),
+        "Inventory": (inventory, False),
+        "History": (history, False),
+        "History (filtered)": (lambda: history(['CAST("customer" AS TEXT) LIKE ?'], ("%Customer 12%",)), False),
+    }
+    for tab in ["Sales", "Purchases", "Expenses", "Staff", "Stock History"]:
+        sets[f"Reports: {tab}"] = (lambda tab=tab: run_query(*report_sql(tab, d1, d2), fetch=True), False)
+    sets["Reports: Dues"] = (lambda: get_customer_dues(None), False)
+    sets["Reports: Profit & Loss"] = (lambda: compute_pnl(d1, d2), False)
+    sets["Backup (filtered)"] = (backup, True)
+    return sets
+
+def percentile(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(q * (len(xs) - 1))))]
+
+def run_set(fn, runs, conn):
+    """ Times `runs` calls after one warm-up; counts statements sent on the shared connection. """
+    stmts = []
+    fn()
+    conn.set_trace_callback(stmts.append)
+    try:
+        times = []
+        for _ in range(runs):
+            del stmts[:]
+            t = time.perf_counter(); fn(); times.append(time.perf_counter() - t)
+    finally:
+        conn.set_trace_callback(None)
+    # Trigger bodies show up as "-- TRIGGER ..." lines; only count statements we issued
+    queries = sum(1 for s in stmts if not s.startswith("--"))
+    return {"p50_ms": round(statistics.median(times) * 1000, 2), "p95_ms": round(percentile(times, 0.95) * 1000, 2),
+            "runs": runs, "queries": queries}
+
+def db_meta(conn, path):
+    tables = ["items", "customers", "sales", "sale_items", "payments", "expenses", "staff_work", "purchases", "stock_logs"]
+    try: rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError: rev = ""
+    return {"rows": {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables},
+            "db_mb": round(os.path.getsize(path) / 2**20, 1), "sqlite": sqlite3.sqlite_version,
+            "python": platform.python_version(), "machine": platform.platform(), "commit": rev,
+            "when": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--db", help="database to copy (default: the bundled one)")
+    ap.add_argument("--runs", type=int, default=15)
+    ap.add_argument("--window", type=int, default=30, help="days in the date-filtered sets, ending at the newest sale")
+    ap.add_argument("--only", help="run only sets whose name contains this text")
+    ap.add_argument("--save", help="write results to this JSON file")
+    ap.add_argument("--compare", help="baseline JSON to diff against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown vs the baseline (0.25 = 25%%)")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="vsr_bench_")
+    try:
+        sys.path.insert(0, ROOT)
+        src = args.db or os.path.join(ROOT, "vsr_threads_final_v91.db")
+        db = os.path.join(tmp, "bench.db"); shutil.copyfile(src, db)
+        os.environ["VSR_DB"] = db
+        from vsr_db import get_conn, init_db, safe_get, run_query
+        init_db()  # migrates an older copy; the source file is never touched
+        conn = get_conn()
+
+        last = safe_get(run_query("SELECT MAX(date) FROM sales", fetch=True), None)
+        d2 = date.fromisoformat(last) if last else date.today(); d1 = d2 - timedelta(days=args.window - 1)
+        cid = safe_get(run_query("SELECT customer_id FROM sales WHERE customer_id IS NOT NULL GROUP BY customer_id ORDER BY COUNT(*) DESC LIMIT 1", fetch=True), None)
+        meta = db_meta(conn, db); meta.update(window=[d1.isoformat(), d2.isoformat()], source=os.path.abspath(src))
+        print(f"{os.path.basename(src)}: " + ", ".join(f"{k} {v:,}" for k, v in meta["rows"].items()))
+        print(f"date window {d1} .. {d2}\n")
+
+        base = {}
+        if args.compare:
+            with open(args.compare) as f: base = json.load(f)["sets"]
+        print(f"{'query set':<26}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}" + (f"{'base p50':>11}{'change':>9}" if base else ""))
+        results, regressed = {}, []
+        for name, (fn, slow) in query_sets(d1, d2, cid, tmp).items():
+            if args.only and args.only.lower() not in name.lower(): continue
+            r = results[name] = run_set(fn, min(args.runs, SLOW_RUNS) if slow else args.runs, conn)
+            line = f"{name:<26}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['queries']:>9}"
+            b = base.get(name)
+            if b:
+                change = r["p50_ms"] / b["p50_ms"] - 1 if b["p50_ms"] else 0.0
+                # Ignore sub-millisecond jitter on fast sets
+                bad = change > args.tolerance and r["p50_ms"] - b["p50_ms"] > 1.0
+                if bad: regressed.append(name)
+                line += f"{b['p50_ms']:>11.2f}{change:>+9.0%}" + ("  REGRESSION" if bad else "")
+            print(line)
+
+        if args.save:
+            with open(args.save, "w") as f: json.dump({"meta": meta, "sets": results}, f, indent=2)
+            print(f"\nsaved {args.save}")
+        if regressed:
+            print(f"\n{len(regressed)} set(s) slower than the baseline by more than {args.tolerance:.0%}: {', '.join(regressed)}")
+            sys.exit(1)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
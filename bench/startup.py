@@ -0,0 +1,74 @@
+""" Cold-start benchmark: time to the login screen and the import cost of each page.
+
+Every sample runs in a fresh interpreter (nothing cached in sys.modules) against
+a scratch copy of the database, so the numbers match a first launch of the EXE.
+
+    python bench/startup.py [--runs 5] [--db path/to/copy.db]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "numpy", "fpdf", "PIL", "qrcode", "cryptography")
+
+LOGIN_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file("vsr_app.py", default_timeout=120); at.run()
+t2 = time.perf_counter()
+assert not at.exception, [e.value for e in at.exception]
+assert at.button(key="login_btn"), "login screen not shown"
+print(json.dumps({"streamlit": t1 - t0, "login": t2 - t1, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY,)
+
+PAGE_PROBE = """
+import json, sys, time
+import streamlit, vsr_assets, vsr_db, vsr_pages   # what the login screen already loaded
+before = set(sys.modules)
+t0 = time.perf_counter()
+vsr_pages.load_page(%r)
+t1 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "heavy": [m for m in %r if m in sys.modules and m not in before]}))
+"""
+
+def probe(code, env):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if out.returncode: raise RuntimeError(out.stderr.strip().splitlines()[-1])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--db", help="database to copy (default: the bundled one)")
+    args = ap.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from vsr_db import ALL_PAGES, get_db_path
+    tmp = tempfile.mkdtemp(prefix="vsr_bench_")
+    try:
+        db = os.path.join(tmp, "bench.db"); shutil.copyfile(args.db or get_db_path('vsr_threads_final_v91.db'), db)
+        env = dict(os.environ, VSR_DB=db, PYTHONDONTWRITEBYTECODE="1")
+        probe(LOGIN_PROBE, env)  # first run migrates the copy; not counted
+
+        ms = lambda xs: f"{statistics.median(xs) * 1000:8.1f} ms"
+        runs = [probe(LOGIN_PROBE, env) for _ in range(args.runs)]
+        print(f"{'import streamlit':<22}{ms([r['streamlit'] for r in runs])}")
+        print(f"{'first run to login':<22}{ms([r['login'] for r in runs])}   heavy modules loaded: {', '.join(runs[0]['heavy']) or 'none'}")
+        print(f"{'time to login screen':<22}{ms([r['streamlit'] + r['login'] for r in runs])}")
+        print("\nper-page import (on top of the login screen):")
+        for page in ALL_PAGES:
+            runs = [probe(PAGE_PROBE % (page, HEAVY), env) for _ in range(args.runs)]
+            print(f"  {page:<20}{ms([r['import'] for r in runs])}   {', '.join(runs[0]['heavy'])}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+""" Shared fixtures. VSR_DB is pointed at a scratch file before vsr_db is
+imported (it reads the path once), so no test can touch the bundled DB. """
+import os
+import sqlite3
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['VSR_DB'] = os.path.join(tempfile.mkdtemp(prefix="vsr_test_"), "vsr.db")
+
+import vsr_db
+
+@pytest.fixture
+def conn(tmp_path):
+    """ A fresh database at SCHEMA_VERSION, opened the way the app opens it. """
+    c = vsr_db.open_conn(str(tmp_path / "vsr.db"))
+    vsr_db.migrate(c)
+    yield c
+    c.close()
+
+@pytest.fixture
+def rebuilt():
+    """ rebuilt(conn, rebuild, sql): rows of sql after rebuild() ran on an
+    in-memory copy of conn, leaving conn itself untouched. """
+    def run(conn, rebuild, sql):
+        copy = sqlite3.connect(":memory:"); conn.backup(copy)
+        try:
+            rebuild(copy.cursor())
+            return copy.execute(sql).fetchall()
+        finally: copy.close()
+    return run
@@ -0,0 +1,59 @@
+""" customer_balances is kept by triggers on customers, sales and payments;
+after any mix of writes it must match rebuild_customer_balances. """
+import random
+from vsr_db import CUSTOMER_DUES, rebuild_customer_balances
+
+BALANCES = "SELECT customer_id, ROUND(opening_due, 2), ROUND(invoiced, 2), ROUND(paid, 2) FROM customer_balances ORDER BY customer_id"
+
+def ids(conn, table):
+    return [r[0] for r in conn.execute(f"SELECT id FROM {table}")]
+
+def money(rng):
+    return rng.randint(0, 200000) / 100
+
+def random_ledger(conn, rng, steps=400):
+    """ Sales and payments inserted, re-assigned, re-priced and deleted
+    (payments tied to a sale cascade with it), plus walk-in sales. """
+    conn.executemany("INSERT INTO customers (name, phone, opening_due) VALUES (?,?,?)",
+                     [(f"Cust {i}", "", rng.choice([None, money(rng)])) for i in range(6)])
+    for _ in range(steps):
+        custs = ids(conn, 'customers'); cust = rng.choice(custs + [None])
+        op = rng.randrange(9)
+        if op == 0:
+            total = money(rng)
+            conn.execute("INSERT INTO sales (date, customer_id, sub_total, grand_total, paid_amount) VALUES ('2024-01-01',?,?,?,0)", (cust, total, total))
+        elif op == 1 and ids(conn, 'sales'):
+            conn.execute("UPDATE sales SET grand_total=? WHERE id=?", (rng.choice([None, money(rng)]), rng.choice(ids(conn, 'sales'))))
+        elif op == 2 and ids(conn, 'sales'):
+            conn.execute("UPDATE sales SET customer_id=? WHERE id=?", (cust, rng.choice(ids(conn, 'sales'))))
+        elif op == 3 and ids(conn, 'sales'):
+            conn.execute("DELETE FROM sales WHERE id=?", (rng.choice(ids(conn, 'sales')),))
+        elif op == 4:
+            sale = rng.choice(ids(conn, 'sales') + [None])
+            conn.execute("INSERT INTO payments (date, customer_id, sale_id, amount, note) VALUES ('2024-01-02',?,?,?,'')", (cust, sale, money(rng)))
+        elif op == 5 and ids(conn, 'payments'):
+            conn.execute("UPDATE payments SET amount=?, customer_id=? WHERE id=?", (money(rng), cust, rng.choice(ids(conn, 'payments'))))
+        elif op == 6 and ids(conn, 'payments'):
+            conn.execute("DELETE FROM payments WHERE id=?", (rng.choice(ids(conn, 'payments')),))
+        elif op == 7:
+            conn.execute("UPDATE customers SET opening_due=? WHERE id=?", (money(rng), rng.choice(custs)))
+        elif op == 8:
+            # A customer with no history may be deleted; their balance row goes with them
+            conn.execute("""DELETE FROM customers WHERE id = (SELECT id FROM customers c WHERE NOT EXISTS (SELECT 1 FROM sales WHERE customer_id = c.id)
+                            AND NOT EXISTS (SELECT 1 FROM payments WHERE customer_id = c.id) LIMIT 1)""")
+            conn.execute("INSERT INTO customers (name, phone, opening_due) VALUES ('New', '', ?)", (money(rng),))
+    conn.commit()
+
+def test_customer_balances_match_rebuild(conn, rebuilt):
+    random_ledger(conn, random.Random(3))
+    assert conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0] > 0
+    assert [tuple(r) for r in conn.execute(BALANCES)] == rebuilt(conn, rebuild_customer_balances, BALANCES)
+
+def test_customer_dues(conn):
+    cid = conn.execute("INSERT INTO customers (name, phone, opening_due) VALUES ('Kumar', '', 100)").lastrowid
+    sid = conn.execute("INSERT INTO sales (date, customer_id, grand_total) VALUES ('2024-01-01', ?, 500)", (cid,)).lastrowid
+    conn.execute("INSERT INTO payments (date, customer_id, sale_id, amount) VALUES ('2024-01-01', ?, ?, 200)", (cid, sid))
+    due = lambda: conn.execute(f"SELECT due FROM ({CUSTOMER_DUES}) WHERE id=?", (cid,)).fetchone()[0]
+    assert due() == 400
+    conn.execute("DELETE FROM sales WHERE id=?", (sid,))  # its payment cascades
+    assert due() == 100
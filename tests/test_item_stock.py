@@ -0,0 +1,63 @@
+""" item_stock is kept by triggers; after any mix of writes it must match a
+from-scratch rebuild. """
+import random
+from vsr_db import rebuild_item_stock
+
+STOCK = "SELECT item_id, added, sold FROM item_stock WHERE added != 0 OR sold != 0 ORDER BY item_id"
+
+def ids(conn, table):
+    return [r[0] for r in conn.execute(f"SELECT id FROM {table}")]
+
+def random_writes(conn, rng, steps=400):
+    """ Inserts, updates and deletes across sales/sale_items, stock_logs and
+    staff_work/staff_work_items, including deletes that cascade. """
+    items = list(range(1, 9))
+    conn.executemany("INSERT INTO items (id, name, color, opening_stock, cost_price, sell_price) VALUES (?,?,?,?,?,?)",
+                     [(i, f"Thread_{i}", "Red", 100, 10, 15) for i in items])
+    for _ in range(steps):
+        op = rng.randrange(9)
+        if op == 0:
+            sid = conn.execute("INSERT INTO sales (date, customer_id, sub_total, grand_total, paid_amount) VALUES ('2024-01-01', NULL, 0, 0, 0)").lastrowid
+            conn.executemany("INSERT INTO sale_items (sale_id, item_id, qty, price_per_unit, cost_per_unit) VALUES (?,?,?,15,10)",
+                             [(sid, rng.choice(items), rng.randint(1, 20)) for _ in range(rng.randint(1, 4))])
+        elif op == 1 and ids(conn, 'sale_items'):
+            conn.execute("UPDATE sale_items SET qty=? WHERE id=?", (rng.randint(0, 30), rng.choice(ids(conn, 'sale_items'))))
+        elif op == 2 and ids(conn, 'sale_items'):
+            conn.execute("UPDATE sale_items SET item_id=? WHERE id=?", (rng.choice(items), rng.choice(ids(conn, 'sale_items'))))
+        elif op == 3 and ids(conn, 'sale_items'):
+            conn.execute("DELETE FROM sale_items WHERE id=?", (rng.choice(ids(conn, 'sale_items')),))
+        elif op == 4 and ids(conn, 'sales'):
+            conn.execute("DELETE FROM sales WHERE id=?", (rng.choice(ids(conn, 'sales')),))  # lines cascade
+        elif op == 5:
+            conn.execute("INSERT INTO stock_logs (date, item_id, qty_added, notes) VALUES ('2024-01-01',?,?,'')",
+                         (rng.choice(items), rng.choice([None, rng.randint(-10, 50)])))
+        elif op == 6 and ids(conn, 'stock_logs'):
+            conn.execute("UPDATE stock_logs SET item_id=?, qty_added=? WHERE id=?",
+                         (rng.choice(items), rng.randint(0, 50), rng.choice(ids(conn, 'stock_logs'))))
+        elif op == 7 and ids(conn, 'stock_logs'):
+            conn.execute("DELETE FROM stock_logs WHERE id=?", (rng.choice(ids(conn, 'stock_logs')),))
+        elif op == 8:
+            if ids(conn, 'staff_work') and rng.random() < 0.4:
+                conn.execute("DELETE FROM staff_work WHERE id=?", (rng.choice(ids(conn, 'staff_work')),))  # items + salary cascade
+            else:
+                wid = conn.execute("INSERT INTO staff_work (date, staff_name, kg_provided, total_salary) VALUES ('2024-01-01','Ravi',5,100)").lastrowid
+                i = rng.choice(items)
+                conn.execute("INSERT INTO staff_work_items (work_id, item_id, item_name, grams, qty_produced, rate, amount) VALUES (?,?,?,500,10,10,100)", (wid, i, f"Thread_{i}"))
+                conn.execute("INSERT INTO expenses (date, category, description, amount, staff_entry_id) VALUES ('2024-01-01','Salary','Salary: Ravi',100,?)", (wid,))
+    conn.commit()
+
+def test_item_stock_matches_rebuild(conn, rebuilt):
+    random_writes(conn, random.Random(2))
+    assert conn.execute("SELECT COUNT(*) FROM sale_items").fetchone()[0] > 0
+    assert conn.execute("SELECT COUNT(*) FROM stock_logs").fetchone()[0] > 0
+    assert [tuple(r) for r in conn.execute(STOCK)] == rebuilt(conn, rebuild_item_stock, STOCK)
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+def test_cascaded_lines_leave_stock(conn):
+    conn.execute("INSERT INTO items (id, name, opening_stock) VALUES (1, 'Thread_6', 100)")
+    sid = conn.execute("INSERT INTO sales (date, grand_total) VALUES ('2024-01-01', 30)").lastrowid
+    conn.execute("INSERT INTO sale_items (sale_id, item_id, qty, price_per_unit, cost_per_unit) VALUES (?, 1, 2, 15, 10)", (sid,))
+    assert conn.execute("SELECT sold FROM item_stock WHERE item_id=1").fetchone()[0] == 2
+    conn.execute("DELETE FROM sales WHERE id=?", (sid,))
+    assert conn.execute("SELECT COUNT(*) FROM sale_items").fetchone()[0] == 0
+    assert conn.execute("SELECT sold FROM item_stock WHERE item_id=1").fetchone()[0] == 0
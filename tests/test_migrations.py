@@ -0,0 +1,74 @@
+""" Upgrading a pre-versioning database (user_version 0) to SCHEMA_VERSION. """
+import hashlib
+import sqlite3
+import pytest
+import vsr_db
+from vsr_db import SCHEMA_VERSION, migrate, open_conn
+
+BILL_A = b"%PDF-1.4 bill A" * 100
+BILL_B = b"\x89PNG bill B"
+
+@pytest.fixture
+def legacy(tmp_path):
+    """ A user_version 0 database as the app left it before migrations: no
+    FK constraints and scanned bills stored inline in purchases. """
+    path = str(tmp_path / "legacy.db")
+    raw = sqlite3.connect(path); c = raw.cursor()
+    vsr_db._base_schema(c)
+    c.execute("INSERT INTO items (id, name, color, opening_stock) VALUES (1, 'Thread_6', 'Red', 50)")
+    c.execute("INSERT INTO customers (id, name, opening_due) VALUES (1, 'Kumar', 100)")
+    for sid in (1, 2):
+        c.execute("INSERT INTO sales (id, date, customer_id, sub_total, grand_total, paid_amount) VALUES (?, '2024-01-01', 1, 300, 300, 0)", (sid,))
+        c.execute("INSERT INTO sale_items (sale_id, item_id, qty, price_per_unit, cost_per_unit) VALUES (?, 1, 3, 100, 60)", (sid,))
+        c.execute("INSERT INTO payments (date, customer_id, sale_id, amount) VALUES ('2024-01-02', 1, ?, 50)", (sid,))
+    c.execute("INSERT INTO staff_work (id, date, staff_name, kg_provided, total_salary) VALUES (1, '2024-01-01', 'Ravi', 5, 400)")
+    c.execute("INSERT INTO staff_work_items (work_id, item_id, grams, qty_produced, rate, amount) VALUES (1, 1, 500, 10, 40, 400)")
+    c.execute("INSERT INTO expenses (date, category, description, amount, staff_entry_id) VALUES ('2024-01-01', 'Salary', 'Salary: Ravi', 400, 1)")
+    c.executemany("INSERT INTO purchases (date, description, total_amount, bill_file, bill_filename) VALUES ('2024-01-01', ?, 1000, ?, ?)",
+                  [("yarn", BILL_A, "a.pdf"), ("dye", BILL_A, "a_copy.pdf"), ("cones", BILL_B, "b.png"), ("misc", None, None)])
+    raw.commit(); raw.close()
+    conn = open_conn(path)
+    yield conn
+    conn.close()
+
+def test_upgrade_reaches_current_version(legacy):
+    assert legacy.execute("PRAGMA user_version").fetchone()[0] == 0
+    assert migrate(legacy) == SCHEMA_VERSION
+    assert legacy.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION == 4
+    assert legacy.execute("PRAGMA foreign_key_check").fetchall() == []
+    # Rows survive the table rebuilds, and the ledgers were backfilled
+    assert legacy.execute("SELECT COUNT(*) FROM sale_items").fetchone()[0] == 2
+    assert tuple(legacy.execute("SELECT added, sold FROM item_stock WHERE item_id=1").fetchone()) == (0, 6)
+    assert tuple(legacy.execute("SELECT opening_due, invoiced, paid FROM customer_balances WHERE customer_id=1").fetchone()) == (100, 600, 100)
+    assert legacy.execute("SELECT sales_total FROM daily_summary WHERE date='2024-01-01'").fetchone()[0] == 600
+
+def test_cascades_delete_children(legacy):
+    migrate(legacy)
+    legacy.execute("DELETE FROM sales WHERE id=1")
+    assert legacy.execute("SELECT COUNT(*) FROM sale_items WHERE sale_id=1").fetchone()[0] == 0
+    assert legacy.execute("SELECT COUNT(*) FROM payments WHERE sale_id=1").fetchone()[0] == 0
+    assert legacy.execute("SELECT COUNT(*) FROM sale_items").fetchone()[0] == 1
+    assert legacy.execute("SELECT sold FROM item_stock WHERE item_id=1").fetchone()[0] == 3
+    legacy.execute("DELETE FROM staff_work WHERE id=1")
+    assert legacy.execute("SELECT COUNT(*) FROM staff_work_items").fetchone()[0] == 0
+    assert legacy.execute("SELECT COUNT(*) FROM expenses").fetchone()[0] == 0
+
+def test_inline_bills_move_to_attachments(legacy):
+    migrate(legacy)
+    assert legacy.execute("SELECT COUNT(*) FROM purchases WHERE bill_file IS NOT NULL").fetchone()[0] == 0
+    bills = {r['description']: r['bill_sha256'] for r in legacy.execute("SELECT description, bill_sha256 FROM purchases")}
+    sha_a, sha_b = hashlib.sha256(BILL_A).hexdigest(), hashlib.sha256(BILL_B).hexdigest()
+    assert bills == {"yarn": sha_a, "dye": sha_a, "cones": sha_b, "misc": None}
+    stored = {r['sha256']: (bytes(r['data']), r['mime'], r['size']) for r in legacy.execute("SELECT * FROM attachments")}
+    assert stored == {sha_a: (BILL_A, "application/pdf", len(BILL_A)), sha_b: (BILL_B, "image/png", len(BILL_B))}
+    # A stored bill is dropped only when its last purchase goes
+    legacy.execute("DELETE FROM purchases WHERE description='yarn'")
+    assert legacy.execute("SELECT COUNT(*) FROM attachments WHERE sha256=?", (sha_a,)).fetchone()[0] == 1
+    legacy.execute("DELETE FROM purchases WHERE description='dye'")
+    assert legacy.execute("SELECT COUNT(*) FROM attachments WHERE sha256=?", (sha_a,)).fetchone()[0] == 0
+
+def test_migrate_is_idempotent(legacy):
+    migrate(legacy)
+    schema = legacy.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall()
+    assert migrate(legacy) == SCHEMA_VERSION
+    assert legacy.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall() == schema
@@ -0,0 +1,77 @@
+""" Asset files (logo, title, fonts) and the process-wide registry of what is
+derived from them. Standard library only at import time, so the login screen
+can show the logo without loading Pillow. """
+import io
+import os
+import sys
+import time
+import threading
+
+
+def resource_path(relative_path):
+    """ Get absolute path to resource, works for dev and for PyInstaller """
+    try:
+        # PyInstaller creates a temp folder and stores path in _MEIPASS
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+
+    return os.path.join(base_path, relative_path)
+
+def asset_mtime(name):
+    path = resource_path(name)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+# --- ASSET REGISTRY ---
+class AssetRegistry:
+    """ Process-wide cache of everything derived from asset files (bytes, base64,
+    resized PNGs, decoded images, PDF image resources) plus a few non-file
+    values like the LAN IP. File entries are keyed by (name, variant) and rebuilt
+    when the file's mtime changes; mtimes are re-checked at most every
+    `recheck` seconds, so steady-state reads do no file or socket I/O. """
+    def __init__(self, recheck=5.0):
+        self.recheck = recheck
+        self._entries = {}; self._stat = {}; self._memo = {}
+        self._lock = threading.Lock()
+
+    def mtime(self, name):
+        """ Asset mtime (None if missing), from a stat at most every `recheck` seconds. """
+        now = time.monotonic(); seen = self._stat.get(name)
+        if seen is None or now - seen[0] > self.recheck:
+            seen = (now, asset_mtime(name)); self._stat[name] = seen
+        return seen[1]
+
+    def get(self, name, variant, build):
+        """ build(path) for an asset, cached until its mtime changes; None if the file is missing. """
+        m = self.mtime(name)
+        if m is None: return None
+        hit = self._entries.get((name, variant))
+        if hit and hit[0] == m: return hit[1]
+        val = build(resource_path(name))
+        with self._lock: self._entries[(name, variant)] = (m, val)
+        return val
+
+    def memo(self, key, build, ttl=None):
+        """ build() cached for `ttl` seconds (forever if None). """
+        now = time.monotonic(); hit = self._memo.get(key)
+        if hit and (ttl is None or now - hit[0] < ttl): return hit[1]
+        val = build()
+        with self._lock: self._memo[key] = (now, val)
+        return val
+
+ASSETS = AssetRegistry()
+
+def read_bytes(path):
+    with open(path, "rb") as f: return f.read()
+
+def open_rgba(path):
+    from PIL import Image  # deferred: Pillow is only needed once an image is drawn
+    with Image.open(path) as im: return im.convert("RGBA")
+
+def resized_png(path, width):
+    """ PNG bytes of an asset scaled to `width` px. """
+    from PIL import Image
+    im = open_rgba(path); h = max(1, round(im.size[1] * width / im.size[0]))
+    buf = io.BytesIO(); im.resize((width, h), Image.Resampling.LANCZOS).save(buf, format="PNG")
+    return buf.getvalue()
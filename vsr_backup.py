@@ -0,0 +1,235 @@
+""" Online backups of the live database: full copies through the SQLite backup
+API and date-filtered copies built row by row, with optional compression.
+
+Kept free of Streamlit. Sources are opened read-only and, under WAL, never
+block the writers of other sessions. """
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from vsr_db import DB_FILE, open_readonly, rebuild_customer_balances, rebuild_daily_summary, rebuild_item_stock
+
+BACKUP_PAGES = 1024  # pages copied per backup step (4 MB at the default page size)
+COMPRESSION = {"None": "", "gzip": ".gz", "zstd": ".zst"}
+
+def online_backup(dest, progress=None, pages=BACKUP_PAGES, pause=0):
+    """ Page-stepped copy of the live DB to `dest`. progress(copied, total) runs
+    after each step; `pause` seconds between steps leave the disk to foreground reads. """
+    def step(status, remaining, total):
+        if progress: progress(total - remaining, total)
+        if pause: time.sleep(pause)
+    src = open_readonly(); dst = sqlite3.connect(dest)
+    try:
+        # Pin one snapshot: otherwise every commit from another connection
+        # restarts the copy from page 1 and a busy DB may never finish
+        src.execute("BEGIN"); src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+        src.backup(dst, pages=pages, progress=step if progress or pause else None)
+        # The copy inherits WAL mode; a single self-contained file is easier to move and checksum
+        dst.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dst.close(); src.close()
+
+# --- FILTERED BACKUP ---
+# Dated tables keep rows in d1..d2 plus undated ones (the old copy-and-prune
+# backup only deleted rows dated outside the range), child tables follow
+# their parent and every other table is copied whole. The trigger-maintained
+# tables are rebuilt from the copied rows instead of being copied.
+DATED = "(date IS NULL OR date BETWEEN :d1 AND :d2)"
+ROW_FILTERS = {
+    'sales': DATED, 'purchases': DATED, 'expenses': DATED, 'staff_work': DATED, 'stock_logs': DATED, 'payments': DATED,
+    'sale_items': f"sale_id IN (SELECT id FROM live.sales WHERE {DATED})",
+    'staff_work_items': f"work_id IN (SELECT id FROM live.staff_work WHERE {DATED})",
+    'attachments': f"sha256 IN (SELECT bill_sha256 FROM live.purchases WHERE {DATED})",
+}
+DERIVED = {'item_stock': rebuild_item_stock, 'customer_balances': rebuild_customer_balances, 'daily_summary': rebuild_daily_summary}
+
+def filtered_backup(dest, d1, d2, progress=None):
+    """ New database at `dest` holding only rows dated d1..d2, copied out of the
+    live DB with INSERT ... SELECT. `dest` must be missing or empty (mkstemp).
+    progress(done, total) runs per table. """
+    if os.path.exists(dest) and os.path.getsize(dest): raise FileExistsError(dest)
+    # Open dest as an encoded file: URI so '?' or '#' in the path stay literal;
+    # URI mode must stay on for the ATTACH below to honour mode=ro
+    conn = sqlite3.connect(Path(dest).resolve().as_uri(), uri=True)
+    try:
+        conn.execute("ATTACH DATABASE ? AS live", (Path(DB_FILE).resolve().as_uri() + "?mode=ro",))
+        schema = conn.execute("""SELECT type, name, sql FROM live.sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+                                 ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 WHEN 'view' THEN 2 ELSE 3 END""").fetchall()
+        tables = [n for t, n, _ in schema if t == 'table']
+        prm = {'d1': str(d1), 'd2': str(d2)}
+        # One transaction: every read sees the same snapshot of the live DB
+        conn.execute("BEGIN")
+        for _, _, sql in (s for s in schema if s[0] == 'table'): conn.execute(sql)
+        for i, t in enumerate(tables):
+            if t not in DERIVED:
+                conn.execute(f'INSERT INTO main."{t}" SELECT * FROM live."{t}" WHERE {ROW_FILTERS.get(t, "1")}', prm)
+            if progress: progress(i + 1, len(tables))
+        c = conn.cursor()
+        for t, rebuild in DERIVED.items():
+            if t in tables: rebuild(c)
+        if conn.execute("SELECT 1 FROM live.sqlite_master WHERE name='sqlite_sequence'").fetchone():
+            conn.execute("DELETE FROM main.sqlite_sequence"); conn.execute("INSERT INTO main.sqlite_sequence SELECT * FROM live.sqlite_sequence")
+        # Indexes after the bulk insert (one sort each), triggers last so the copy doesn't fire them
+        for t, _, sql in schema:
+            if t != 'table': conn.execute(sql)
+        conn.execute("ANALYZE main")
+        conn.execute(f"PRAGMA main.user_version={conn.execute('PRAGMA live.user_version').fetchone()[0]}")
+        conn.commit(); conn.execute("DETACH DATABASE live")
+    except Exception:
+        conn.close(); os.remove(dest); raise
+    conn.close()
+
+# --- COMPRESSION ---
+def _zstd_open(path):
+    try: from compression import zstd  # Python 3.14+
+    except ImportError:
+        try: import zstandard
+        except ImportError: raise RuntimeError("zstd compression needs the zstandard package (pip install zstandard)") from None
+        return zstandard.ZstdCompressor().stream_writer(open(path, "wb"), closefd=True)
+    return zstd.open(path, "wb")
+
+def compress_file(path, method):
+    """ Stream `path` into a compressed sibling, remove the original and return the new path. """
+    ext = COMPRESSION[method]
+    if not ext: return path
+    out = path + ext
+    try:
+        with open(path, "rb") as src, (gzip.open(out, "wb", compresslevel=6) if ext == ".gz" else _zstd_open(out)) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+    except Exception:
+        if os.path.exists(out): os.remove(out)
+        raise
+    os.remove(path)
+    return out
+
+# --- SCHEDULED SNAPSHOTS ---
+# A daemon thread per server process keeps restorable snapshots in BACKUP_DIR:
+# an "hourly" one every backup_every_min minutes and a "daily" one per day,
+# each with a sha256sum-style sidecar. A run is skipped when PRAGMA
+# data_version shows no commit since the last snapshot. Interval and
+# retention live in the settings table (Settings > Automatic Backups).
+BACKUP_DIR = os.environ.get('VSR_BACKUP_DIR') or os.path.join(os.path.dirname(os.path.abspath(DB_FILE)), "backups")
+BACKUP_DEFAULTS = {'backup_every_min': 60, 'backup_keep_hourly': 24, 'backup_keep_daily': 14}
+SNAPSHOT_PAGES = 256     # small steps (1 MB at the default page size)...
+SNAPSHOT_PAUSE = 0.02    # ...with a short sleep after each
+CHECK_EVERY = 60         # seconds between schedule checks
+_SNAPSHOT_NAME = re.compile(r"vsr-(hourly|daily)-(\d{8}-\d{6})\.db")
+
+def list_snapshots(directory=None):
+    """ Stored snapshots as dicts (path, tier, when, size), newest first. """
+    directory = directory or BACKUP_DIR; out = []
+    for f in os.listdir(directory) if os.path.isdir(directory) else []:
+        m = _SNAPSHOT_NAME.fullmatch(f)
+        if m:
+            p = os.path.join(directory, f)
+            out.append({'path': p, 'tier': m.group(1), 'when': datetime.strptime(m.group(2), "%Y%m%d-%H%M%S"), 'size': os.path.getsize(p)})
+    return sorted(out, key=lambda s: s['when'], reverse=True)
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for b in iter(lambda: f.read(1 << 20), b""): h.update(b)
+    return h.hexdigest()
+
+def read_checksum(path):
+    """ Hex digest recorded in the snapshot's .sha256 sidecar, or None. """
+    try:
+        with open(path + ".sha256") as f: return f.read().split()[0]
+    except (OSError, IndexError): return None
+
+def verify_snapshot(path):
+    sha = read_checksum(path); return sha is not None and sha == file_sha256(path)
+
+def _write_checksum(path, sha):
+    # Same format as sha256sum, so `sha256sum -c` works in the backups folder
+    with open(path + ".sha256", "w") as f: f.write(f"{sha}  {os.path.basename(path)}\n")
+
+class BackupScheduler:
+    """ Snapshot thread, started once per process; start() is safe to call on
+    every rerun. `status` describes the last check for the Settings page. """
+    def __init__(self, directory=None):
+        self.dir = directory or BACKUP_DIR
+        self.status = {'checked': None, 'message': "Not started", 'error': ""}
+        self._thread = None; self._lock = threading.Lock(); self._wake = threading.Event()
+        self._force = False
+        self._version = None  # data_version seen just before the last snapshot
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="vsr-backup", daemon=True); self._thread.start()
+
+    def run_now(self):
+        """ Take a snapshot at the next check, changed or not, and wake the thread. """
+        self._force = True; self._wake.set()
+
+    def config(self, conn):
+        cfg = dict(BACKUP_DEFAULTS)
+        for k, v in conn.execute(f"SELECT key, value FROM settings WHERE key IN ({', '.join('?' * len(cfg))})", tuple(cfg)):
+            try: cfg[k] = int(float(v))
+            except (TypeError, ValueError): pass
+        return cfg
+
+    def _run(self):
+        conn = open_readonly()
+        if os.path.isdir(self.dir):  # leftovers of a run cut short by a restart
+            for f in os.listdir(self.dir):
+                if f.endswith(".db.part"): os.remove(os.path.join(self.dir, f))
+        while True:
+            try: self.tick(conn)
+            except Exception as e: self.status.update(message="Backup failed", error=str(e))
+            self._wake.wait(CHECK_EVERY); self._wake.clear()
+
+    def tick(self, conn, now=None):
+        """ One schedule check: snapshot if due and changed, then apply retention. """
+        now = now or datetime.now(); cfg = self.config(conn)
+        force, self._force = self._force, False
+        # Read before copying, so commits made during the copy count as changes next time
+        ver = conn.execute("PRAGMA data_version").fetchone()[0]
+        self.status['checked'] = now
+        if cfg['backup_every_min'] <= 0 and not force:
+            self.status.update(message="Automatic backups are off", error=""); return
+        snaps = list_snapshots(self.dir); latest = snaps[0] if snaps else None
+        daily_due = not any(s['tier'] == 'daily' and s['when'].date() == now.date() for s in snaps)
+        hourly_due = latest is None or now - latest['when'] >= timedelta(minutes=cfg['backup_every_min'])
+        if not (force or daily_due or hourly_due): return
+        tier = 'daily' if daily_due else 'hourly'
+        path = os.path.join(self.dir, f"vsr-{tier}-{now:%Y%m%d-%H%M%S}.db")
+        if latest and ver == self._version and not force:
+            if not daily_due:
+                self.status.update(message=f"No changes since {latest['when']:%d-%m %H:%M}; skipped", error=""); return
+            # Nothing new today: the daily is the latest snapshot under another name
+            try: os.link(latest['path'], path)
+            except OSError: shutil.copyfile(latest['path'], path)
+            _write_checksum(path, read_checksum(latest['path']) or file_sha256(path))
+        else:
+            self.snapshot(path)
+        self._version = ver
+        self.prune(cfg['backup_keep_hourly'], cfg['backup_keep_daily'])
+        self.status.update(message=f"Saved {os.path.basename(path)}", error="")
+
+    def snapshot(self, path):
+        os.makedirs(self.dir, exist_ok=True); part = path + ".part"
+        try:
+            online_backup(part, pages=SNAPSHOT_PAGES, pause=SNAPSHOT_PAUSE)
+            sha = file_sha256(part); os.replace(part, path)
+        except Exception:
+            if os.path.exists(part): os.remove(part)
+            raise
+        _write_checksum(path, sha)
+
+    def prune(self, keep_hourly, keep_daily):
+        """ Delete all but the newest keep_hourly / keep_daily snapshots (at least one each). """
+        snaps = list_snapshots(self.dir)
+        for tier, keep in (('hourly', keep_hourly), ('daily', keep_daily)):
+            for s in [x for x in snaps if x['tier'] == tier][max(1, keep):]:
+                for f in (s['path'], s['path'] + ".sha256"):
+                    if os.path.exists(f): os.remove(f)
+
+SCHEDULER = BackupScheduler()
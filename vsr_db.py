@@ -0,0 +1,779 @@
+""" Database layer for VSR Threads: connections, schema and migrations,
+derived ledgers and the shared read helpers.
+
+Kept free of Streamlit so pages, benchmarks and worker threads can import it. """
+import sqlite3
+import os
+import sys
+import hashlib
+import mimetypes
+import threading
+import re
+import time
+from datetime import datetime, date
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+# ==========================================
+# 0. PATH FIXER (FOR EXE)
+# ==========================================
+
+def get_db_path(db_filename):
+    """ Ensure DB is stored next to the EXE, not in the temp folder """
+    if getattr(sys, 'frozen', False):
+        # Running as compiled .exe
+        app_path = os.path.dirname(sys.executable)
+    else:
+        # Running as script
+        app_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(app_path, db_filename)
+
+# SECURITY KEY
+SYSTEM_KEY = b'wJ-7x9Xo2yV_8eZ4p1qQ3kL5n0mR6tA8bC9dE2fG3hI=' 
+
+# CONSTANTS
+ALL_PAGES = [
+    "Dashboard", "Sales & Billing", "Purchases", "Expenses", 
+    "Inventory Items", "Customers", "Staff Work", "Reports", 
+    "Print Stickers", "Password Manager", "Data Inspector", "Settings"
+]
+
+# ==========================================
+# 2. DATABASE SETUP
+# ==========================================
+# Use get_db_path to ensure DB persists outside the temp folder
+# VSR_DB points benchmarks and tests at a scratch copy
+DB_FILE = os.environ.get('VSR_DB') or get_db_path('vsr_threads_final_v91.db') 
+
+def hash_pass(password):
+    return hashlib.sha256(str.encode(password)).hexdigest()
+
+# --- CONNECTION MANAGER ---
+# Connections are pooled for the whole process and checked out per thread. The
+# sqlite3 module keeps a per-connection LRU of prepared statements, so repeat
+# queries skip the parser for as long as the connection lives.
+DB_PRAGMAS = {
+    'journal_mode': 'WAL',       # readers don't block the writer (LAN tablets)
+    'synchronous': 'NORMAL',     # safe with WAL, one fsync per checkpoint
+    'busy_timeout': 5000,        # ms to wait on a locked DB instead of failing
+    'mmap_size': 268435456,      # 256 MB memory-mapped reads
+    'cache_size': -20000,        # ~20 MB page cache (negative = KiB)
+    'foreign_keys': 'ON',        # per-connection; needed for ON DELETE CASCADE
+}
+STMT_CACHE_SIZE = 256
+POOL_SIZE = 8
+
+# Module state lives for the whole process (Streamlit re-runs the page script,
+# not imported modules). Each rerun runs on a fresh script thread, so a plain
+# thread-local connection would last one rerun: instead a thread checks one out
+# of _POOL and hands it back when the rerun ends (release_conn) or the thread dies.
+_POOL = []
+_POOL_LOCK = threading.Lock()
+_CONNS = threading.local()
+
+def open_conn(path=None, check_same_thread=True):
+    """ Open a new tuned connection. Callers own it and must close it. """
+    conn = sqlite3.connect(path or DB_FILE, cached_statements=STMT_CACHE_SIZE, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    for k, v in DB_PRAGMAS.items():
+        conn.execute(f"PRAGMA {k}={v}")
+    return conn
+
+def _return_conn(conn):
+    """ Put a checked-out connection back in the pool, or close it if the pool is full. """
+    try:
+        if conn.in_transaction: conn.rollback()
+        conn.set_trace_callback(None)
+    except sqlite3.Error:
+        conn.close(); return
+    with _POOL_LOCK:
+        if len(_POOL) < POOL_SIZE:
+            _POOL.append(conn); return
+    conn.close()
+
+class _Checkout:
+    """ Thread-local slot; returns its connection to the pool when the thread ends. """
+    def __init__(self, conn): self.conn = conn
+
+    def __del__(self):
+        if self.conn is not None: _return_conn(self.conn)
+
+def get_conn():
+    """ Shared connection for the current thread, checked out of the pool on first use. """
+    slot = getattr(_CONNS, 'slot', None)
+    if slot is None or slot.conn is None:
+        with _POOL_LOCK:
+            conn = _POOL.pop() if _POOL else None
+        slot = _Checkout(conn or open_conn(check_same_thread=False)); _CONNS.slot = slot
+    return slot.conn
+
+def release_conn():
+    """ Hand this thread's connection back to the pool (end of a script run). """
+    slot = getattr(_CONNS, 'slot', None)
+    if slot is not None and slot.conn is not None:
+        conn, slot.conn = slot.conn, None
+        _return_conn(conn)
+
+def _base_schema(c):
+    """ Schema as it stood before versioning (user_version 0). Safe to re-run. """
+    c.execute('''CREATE TABLE IF NOT EXISTS master_names (name TEXT PRIMARY KEY)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, color TEXT, opening_stock INTEGER, cost_price REAL, sell_price REAL)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS stock_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, item_id INTEGER, qty_added INTEGER, notes TEXT)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS customers (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, phone TEXT, address TEXT, opening_due REAL)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS sales (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, customer_id INTEGER, sub_total REAL, cgst_percent REAL, sgst_percent REAL, cgst_amount REAL, sgst_amount REAL, grand_total REAL, paid_amount REAL, notes TEXT, walkin_phone TEXT)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS sale_items (id INTEGER PRIMARY KEY AUTOINCREMENT, sale_id INTEGER, item_id INTEGER, qty INTEGER, price_per_unit REAL, cost_per_unit REAL)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS purchases (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, description TEXT, bags REAL, kg_per_bag REAL, total_kg REAL, price_per_kg REAL, total_amount REAL, vendor_name TEXT, vendor_contact TEXT, is_gst INTEGER, cgst_percent REAL, sgst_percent REAL, bill_file BLOB, bill_filename TEXT)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, category TEXT, description TEXT, amount REAL, staff_entry_id INTEGER)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS staff_work (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, staff_name TEXT, kg_provided REAL, total_salary REAL, notes TEXT)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS staff_work_items (id INTEGER PRIMARY KEY AUTOINCREMENT, work_id INTEGER, item_id INTEGER, grams REAL, qty_produced INTEGER, rate REAL, amount REAL, item_name TEXT)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS payments (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, customer_id INTEGER, sale_id INTEGER, amount REAL, note TEXT)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS app_users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE, password_hash TEXT, role TEXT, permissions TEXT)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS pm_vault (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, type TEXT, website TEXT, login_id TEXT, enc_password TEXT, updated_at TEXT)''')
+
+    try: c.execute("ALTER TABLE staff_work_items ADD COLUMN item_name TEXT")
+    except: pass
+    try: c.execute("ALTER TABLE sales ADD COLUMN walkin_phone TEXT")
+    except: pass
+    try: c.execute("ALTER TABLE purchases ADD COLUMN vendor_name TEXT"); 
+    except: pass
+    try: c.execute("ALTER TABLE purchases ADD COLUMN vendor_contact TEXT"); 
+    except: pass
+    try: c.execute("ALTER TABLE purchases ADD COLUMN is_gst INTEGER DEFAULT 0"); 
+    except: pass
+    try: c.execute("ALTER TABLE purchases ADD COLUMN cgst_percent REAL DEFAULT 0"); 
+    except: pass
+    try: c.execute("ALTER TABLE purchases ADD COLUMN sgst_percent REAL DEFAULT 0"); 
+    except: pass
+    try: c.execute("ALTER TABLE purchases ADD COLUMN bill_file BLOB"); 
+    except: pass
+    try: c.execute("ALTER TABLE purchases ADD COLUMN bill_filename TEXT"); 
+    except: pass
+
+    ensure_derived_table(c, 'item_stock', ITEM_STOCK_DDL, rebuild_item_stock)
+    ensure_derived_table(c, 'customer_balances', CUSTOMER_BALANCES_DDL, rebuild_customer_balances)
+
+# --- STOCK BALANCES ---
+# item_stock holds the running totals behind get_stock(); triggers keep it in
+# step with every sale_items / stock_logs write, so a stock lookup is one
+# primary-key read instead of two SUM scans per item.
+ITEM_STOCK_DDL = [
+    """CREATE TABLE IF NOT EXISTS item_stock (item_id INTEGER PRIMARY KEY, added INTEGER NOT NULL DEFAULT 0, sold INTEGER NOT NULL DEFAULT 0)""",
+    """CREATE TRIGGER IF NOT EXISTS trg_sale_items_ins AFTER INSERT ON sale_items BEGIN
+        INSERT INTO item_stock (item_id, sold) VALUES (NEW.item_id, COALESCE(NEW.qty, 0))
+        ON CONFLICT(item_id) DO UPDATE SET sold = sold + excluded.sold; END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_sale_items_del AFTER DELETE ON sale_items BEGIN
+        INSERT INTO item_stock (item_id, sold) VALUES (OLD.item_id, -COALESCE(OLD.qty, 0))
+        ON CONFLICT(item_id) DO UPDATE SET sold = sold + excluded.sold; END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_sale_items_upd AFTER UPDATE OF item_id, qty ON sale_items BEGIN
+        INSERT INTO item_stock (item_id, sold) VALUES (OLD.item_id, -COALESCE(OLD.qty, 0))
+        ON CONFLICT(item_id) DO UPDATE SET sold = sold + excluded.sold;
+        INSERT INTO item_stock (item_id, sold) VALUES (NEW.item_id, COALESCE(NEW.qty, 0))
+        ON CONFLICT(item_id) DO UPDATE SET sold = sold + excluded.sold; END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_stock_logs_ins AFTER INSERT ON stock_logs BEGIN
+        INSERT INTO item_stock (item_id, added) VALUES (NEW.item_id, COALESCE(NEW.qty_added, 0))
+        ON CONFLICT(item_id) DO UPDATE SET added = added + excluded.added; END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_stock_logs_del AFTER DELETE ON stock_logs BEGIN
+        INSERT INTO item_stock (item_id, added) VALUES (OLD.item_id, -COALESCE(OLD.qty_added, 0))
+        ON CONFLICT(item_id) DO UPDATE SET added = added + excluded.added; END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_stock_logs_upd AFTER UPDATE OF item_id, qty_added ON stock_logs BEGIN
+        INSERT INTO item_stock (item_id, added) VALUES (OLD.item_id, -COALESCE(OLD.qty_added, 0))
+        ON CONFLICT(item_id) DO UPDATE SET added = added + excluded.added;
+        INSERT INTO item_stock (item_id, added) VALUES (NEW.item_id, COALESCE(NEW.qty_added, 0))
+        ON CONFLICT(item_id) DO UPDATE SET added = added + excluded.added; END""",
+]
+
+# Items with their live stock; filter/sort by wrapping it as a subquery
+ITEMS_WITH_STOCK = """SELECT i.*, i.opening_stock + COALESCE(s.added, 0) - COALESCE(s.sold, 0) AS stock
+                      FROM items i LEFT JOIN item_stock s ON s.item_id = i.id"""
+
+def rebuild_item_stock(c):
+    """ Recompute item_stock from scratch (one-shot repair after manual edits). """
+    c.execute("DELETE FROM item_stock")
+    c.execute("""INSERT INTO item_stock (item_id, added, sold)
+                 SELECT item_id, SUM(added), SUM(sold) FROM (
+                     SELECT item_id, COALESCE(qty_added, 0) AS added, 0 AS sold FROM stock_logs
+                     UNION ALL
+                     SELECT item_id, 0, COALESCE(qty, 0) FROM sale_items
+                 ) WHERE item_id IS NOT NULL GROUP BY item_id""")
+
+# --- CUSTOMER BALANCES ---
+# Same idea for dues: opening + invoiced - paid per customer, maintained by
+# triggers on customers, sales and payments. Walk-in rows (NULL customer) are skipped.
+def _bal_upsert(col, cust, amount, when=""):
+    return f"""INSERT INTO customer_balances (customer_id, {col}) SELECT {cust}, {amount} {when or 'WHERE 1'}
+        ON CONFLICT(customer_id) DO UPDATE SET {col} = {col} + excluded.{col};"""
+
+CUSTOMER_BALANCES_DDL = [
+    """CREATE TABLE IF NOT EXISTS customer_balances (customer_id INTEGER PRIMARY KEY, opening_due REAL NOT NULL DEFAULT 0, invoiced REAL NOT NULL DEFAULT 0, paid REAL NOT NULL DEFAULT 0)""",
+    """CREATE TRIGGER IF NOT EXISTS trg_customers_ins AFTER INSERT ON customers BEGIN
+        INSERT OR IGNORE INTO customer_balances (customer_id, opening_due) VALUES (NEW.id, COALESCE(NEW.opening_due, 0)); END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_customers_upd AFTER UPDATE OF opening_due ON customers BEGIN
+        INSERT INTO customer_balances (customer_id, opening_due) VALUES (NEW.id, COALESCE(NEW.opening_due, 0))
+        ON CONFLICT(customer_id) DO UPDATE SET opening_due = excluded.opening_due; END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_customers_del AFTER DELETE ON customers BEGIN
+        DELETE FROM customer_balances WHERE customer_id = OLD.id; END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_sales_ins AFTER INSERT ON sales WHEN NEW.customer_id IS NOT NULL BEGIN
+        {_bal_upsert('invoiced', 'NEW.customer_id', 'COALESCE(NEW.grand_total, 0)')} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_sales_del AFTER DELETE ON sales WHEN OLD.customer_id IS NOT NULL BEGIN
+        {_bal_upsert('invoiced', 'OLD.customer_id', '-COALESCE(OLD.grand_total, 0)')} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_sales_upd AFTER UPDATE OF customer_id, grand_total ON sales BEGIN
+        {_bal_upsert('invoiced', 'OLD.customer_id', '-COALESCE(OLD.grand_total, 0)', 'WHERE OLD.customer_id IS NOT NULL')}
+        {_bal_upsert('invoiced', 'NEW.customer_id', 'COALESCE(NEW.grand_total, 0)', 'WHERE NEW.customer_id IS NOT NULL')} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_payments_ins AFTER INSERT ON payments WHEN NEW.customer_id IS NOT NULL BEGIN
+        {_bal_upsert('paid', 'NEW.customer_id', 'COALESCE(NEW.amount, 0)')} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_payments_del AFTER DELETE ON payments WHEN OLD.customer_id IS NOT NULL BEGIN
+        {_bal_upsert('paid', 'OLD.customer_id', '-COALESCE(OLD.amount, 0)')} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_payments_upd AFTER UPDATE OF customer_id, amount ON payments BEGIN
+        {_bal_upsert('paid', 'OLD.customer_id', '-COALESCE(OLD.amount, 0)', 'WHERE OLD.customer_id IS NOT NULL')}
+        {_bal_upsert('paid', 'NEW.customer_id', 'COALESCE(NEW.amount, 0)', 'WHERE NEW.customer_id IS NOT NULL')} END""",
+]
+
+# Customers with their current due, one row each
+CUSTOMER_DUES = """SELECT c.id, c.name, c.phone,
+                   COALESCE(b.opening_due, c.opening_due, 0) + COALESCE(b.invoiced, 0) - COALESCE(b.paid, 0) AS due
+                   FROM customers c LEFT JOIN customer_balances b ON b.customer_id = c.id"""
+
+def rebuild_customer_balances(c):
+    """ Recompute customer_balances from customers, sales and payments. """
+    c.execute("DELETE FROM customer_balances")
+    # One grouped pass per table; a per-customer subquery has no customer_id-first
+    # index on sales and skip-scans every date for each customer
+    c.execute("""INSERT INTO customer_balances (customer_id, opening_due, invoiced, paid)
+                 SELECT c.id, COALESCE(c.opening_due, 0), COALESCE(s.total, 0), COALESCE(p.total, 0)
+                 FROM customers c
+                 LEFT JOIN (SELECT customer_id, SUM(grand_total) AS total FROM sales GROUP BY customer_id) s ON s.customer_id = c.id
+                 LEFT JOIN (SELECT customer_id, SUM(amount) AS total FROM payments GROUP BY customer_id) p ON p.customer_id = c.id""")
+
+def ensure_derived_table(c, table, ddl_list, rebuild):
+    """ Create a trigger-maintained table, backfilling it the first time. """
+    is_new = not c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+    for ddl in ddl_list: c.execute(ddl)
+    if is_new: rebuild(c)
+
+# --- DAILY SUMMARY ROLLUP ---
+# One row per date with the day's totals, kept current by triggers, so range
+# metrics sum a few hundred rollup rows instead of scanning sales/expenses.
+# Each source: (table, date expression, {summary column: value expression},
+# columns whose UPDATE moves money). {r} is NEW or OLD.
+ROLLUP_COLS = ['sales_total', 'taxable_total', 'tax_total', 'sale_count', 'cogs', 'expenses', 'payments_received', 'purchase_amount', 'purchase_kg', 'purchase_bags']
+SALE_COGS = "(SELECT SUM(qty * cost_per_unit) FROM sale_items WHERE sale_id = {r}.id)"
+ROLLUP_SOURCES = {
+    'sales': ("{r}.date", {'sales_total': "{r}.grand_total", 'taxable_total': "{r}.sub_total",
+                           'tax_total': "COALESCE({r}.cgst_amount, 0) + COALESCE({r}.sgst_amount, 0)",
+                           'sale_count': "1", 'cogs': SALE_COGS},
+              "date, grand_total, sub_total, cgst_amount, sgst_amount"),
+    # Parent lookup is NULL while a sale is being deleted; the sale's own trigger handles those lines
+    'sale_items': ("(SELECT date FROM sales WHERE id = {r}.sale_id)", {'cogs': "{r}.qty * {r}.cost_per_unit"},
+                   "sale_id, qty, cost_per_unit"),
+    'expenses': ("{r}.date", {'expenses': "{r}.amount"}, "date, amount"),
+    'payments': ("{r}.date", {'payments_received': "{r}.amount"}, "date, amount"),
+    'purchases': ("{r}.date", {'purchase_amount': "{r}.total_amount", 'purchase_kg': "{r}.total_kg", 'purchase_bags': "{r}.bags"},
+                  "date, total_amount, total_kg, bags"),
+}
+
+def _rollup_upsert(table, r, sign):
+    date_expr, cols, _ = ROLLUP_SOURCES[table]
+    d = date_expr.format(r=r)
+    vals = ", ".join(f"{sign}COALESCE({v.format(r=r)}, 0)" for v in cols.values())
+    sets = ", ".join(f"{k} = {k} + excluded.{k}" for k in cols)
+    return f"""INSERT INTO daily_summary (date, {', '.join(cols)}) SELECT {d}, {vals} WHERE {d} IS NOT NULL
+        ON CONFLICT(date) DO UPDATE SET {sets};"""
+
+def daily_summary_ddl():
+    ddl = [f"""CREATE TABLE IF NOT EXISTS daily_summary (date TEXT PRIMARY KEY, {', '.join(f'{k} REAL NOT NULL DEFAULT 0' for k in ROLLUP_COLS)})"""]
+    for t, (_, _, watch) in ROLLUP_SOURCES.items():
+        # sales deletes run BEFORE so the sale's lines (removed by cascade) still count
+        when = "BEFORE" if t == 'sales' else "AFTER"
+        ddl.append(f"CREATE TRIGGER IF NOT EXISTS trg_{t}_ds_ins AFTER INSERT ON {t} BEGIN {_rollup_upsert(t, 'NEW', '')} END")
+        ddl.append(f"CREATE TRIGGER IF NOT EXISTS trg_{t}_ds_del {when} DELETE ON {t} BEGIN {_rollup_upsert(t, 'OLD', '-')} END")
+        ddl.append(f"CREATE TRIGGER IF NOT EXISTS trg_{t}_ds_upd AFTER UPDATE OF {watch} ON {t} BEGIN {_rollup_upsert(t, 'OLD', '-')} {_rollup_upsert(t, 'NEW', '')} END")
+    return ddl
+
+def rebuild_daily_summary(c, d1=None, d2=None):
+    """ Recompute the rollup from source tables, for all dates or just d1..d2. """
+    rng = "date BETWEEN ? AND ?" if d1 and d2 else "date IS NOT NULL"
+    prm = [d1, d2] if d1 and d2 else []
+    c.execute(f"DELETE FROM daily_summary WHERE {rng}", prm)
+    parts = [
+        f"SELECT date, grand_total AS sales_total, sub_total AS taxable_total, COALESCE(cgst_amount, 0) + COALESCE(sgst_amount, 0) AS tax_total, 1 AS sale_count, 0 AS cogs, 0 AS expenses, 0 AS payments_received, 0 AS purchase_amount, 0 AS purchase_kg, 0 AS purchase_bags FROM sales WHERE {rng}",
+        f"SELECT s.date, 0, 0, 0, 0, si.qty * si.cost_per_unit, 0, 0, 0, 0, 0 FROM sale_items si JOIN sales s ON s.id = si.sale_id WHERE s.{rng}",
+        f"SELECT date, 0, 0, 0, 0, 0, amount, 0, 0, 0, 0 FROM expenses WHERE {rng}",
+        f"SELECT date, 0, 0, 0, 0, 0, 0, amount, 0, 0, 0 FROM payments WHERE {rng}",
+        f"SELECT date, 0, 0, 0, 0, 0, 0, 0, total_amount, total_kg, bags FROM purchases WHERE {rng}",
+    ]
+    sums = ", ".join(f"COALESCE(SUM({k}), 0)" for k in ROLLUP_COLS)
+    c.execute(f"INSERT INTO daily_summary (date, {', '.join(ROLLUP_COLS)}) SELECT date, {sums} FROM ({' UNION ALL '.join(parts)}) GROUP BY date", prm * len(parts))
+
+def rollup_totals(d1=None, d2=None):
+    """ Summed rollup columns for d1..d2 (all time if either is missing), as a dict. """
+    rng = "WHERE date BETWEEN ? AND ?" if d1 and d2 else ""
+    res = run_query(f"SELECT {', '.join(f'SUM({k})' for k in ROLLUP_COLS)} FROM daily_summary {rng}", (d1, d2) if d1 and d2 else (), fetch=True)
+    row = res[0] if res else [None] * len(ROLLUP_COLS)
+    return {k: (row[i] or 0) for i, k in enumerate(ROLLUP_COLS)}
+
+# --- ATTACHMENT STORE ---
+# Scanned bills live in a content-addressed side table (key = SHA-256 of the
+# bytes), so identical uploads are stored once and purchase listings never
+# touch the blobs. Bytes are only read when a download is requested.
+def guess_mime(filename):
+    return mimetypes.guess_type(filename or "")[0] or "application/octet-stream"
+
+def put_attachment(c, data, mime=None):
+    """ Store bytes (deduplicated) with cursor c; returns the SHA-256 key. """
+    sha = hashlib.sha256(data).hexdigest()
+    c.execute("INSERT OR IGNORE INTO attachments (sha256, size, mime, data, created_at) VALUES (?,?,?,?,?)",
+              (sha, len(data), mime or "application/octet-stream", sqlite3.Binary(data), datetime.now().isoformat(timespec='seconds')))
+    return sha
+
+def get_attachment(sha):
+    res = run_query("SELECT data FROM attachments WHERE sha256=?", (sha,), fetch=True)
+    return bytes(res[0]['data']) if res else b""
+
+# --- SCHEMA MIGRATIONS ---
+# PRAGMA user_version counts the steps already applied. Append new steps to
+# MIGRATIONS; never edit or reorder one that has shipped.
+def _m001_indexes(c):
+    for ddl in [
+        "CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items (sale_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sale_items_item ON sale_items (item_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_date_cust ON sales (date, customer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_cust ON payments (customer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_sale ON payments (sale_id)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (date)",
+        "CREATE INDEX IF NOT EXISTS idx_stock_logs_item_date ON stock_logs (item_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_staff_work_items_work ON staff_work_items (work_id)",
+    ]: c.execute(ddl)
+    c.execute("ANALYZE")
+
+# Child tables re-created with ON DELETE CASCADE so deleting a sale or a staff
+# entry takes its lines, payments and salary expense with it.
+FK_TABLES = {
+    'sale_items': ("""CREATE TABLE sale_items (id INTEGER PRIMARY KEY AUTOINCREMENT, sale_id INTEGER REFERENCES sales(id) ON DELETE CASCADE, item_id INTEGER, qty INTEGER, price_per_unit REAL, cost_per_unit REAL)""",
+                   "id, sale_id, item_id, qty, price_per_unit, cost_per_unit"),
+    'payments': ("""CREATE TABLE payments (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, customer_id INTEGER, sale_id INTEGER REFERENCES sales(id) ON DELETE CASCADE, amount REAL, note TEXT)""",
+                 "id, date, customer_id, sale_id, amount, note"),
+    'staff_work_items': ("""CREATE TABLE staff_work_items (id INTEGER PRIMARY KEY AUTOINCREMENT, work_id INTEGER REFERENCES staff_work(id) ON DELETE CASCADE, item_id INTEGER, grams REAL, qty_produced INTEGER, rate REAL, amount REAL, item_name TEXT)""",
+                         "id, work_id, item_id, grams, qty_produced, rate, amount, item_name"),
+    'expenses': ("""CREATE TABLE expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, category TEXT, description TEXT, amount REAL, staff_entry_id INTEGER REFERENCES staff_work(id) ON DELETE CASCADE)""",
+                 "id, date, category, description, amount, staff_entry_id"),
+}
+
+def _m002_cascades(c):
+    # SQLite can't add a constraint in place: copy into a new table and swap.
+    # DROP TABLE also drops that table's triggers and indexes, so re-create them.
+    for table, (ddl, cols) in FK_TABLES.items():
+        c.execute(ddl.replace(f"CREATE TABLE {table} ", f"CREATE TABLE {table}_fk ", 1))
+        c.execute(f"INSERT INTO {table}_fk ({cols}) SELECT {cols} FROM {table}")
+        c.execute(f"DROP TABLE {table}")
+        c.execute(f"ALTER TABLE {table}_fk RENAME TO {table}")
+    for ddl in ITEM_STOCK_DDL + CUSTOMER_BALANCES_DDL: c.execute(ddl)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_expenses_staff ON expenses (staff_entry_id)")
+    _m001_indexes(c)
+
+def _m003_daily_summary(c):
+    for ddl in daily_summary_ddl(): c.execute(ddl)
+    rebuild_daily_summary(c)
+
+def _m004_attachments(c):
+    c.execute("CREATE TABLE IF NOT EXISTS attachments (sha256 TEXT PRIMARY KEY, size INTEGER, mime TEXT, data BLOB, created_at TEXT)")
+    c.execute("ALTER TABLE purchases ADD COLUMN bill_sha256 TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_purchases_bill ON purchases (bill_sha256)")
+    # Move inline bills out one row at a time to keep memory flat
+    for (pid,) in c.execute("SELECT id FROM purchases WHERE bill_file IS NOT NULL").fetchall():
+        blob, fn = c.execute("SELECT bill_file, bill_filename FROM purchases WHERE id=?", (pid,)).fetchone()
+        sha = put_attachment(c, bytes(blob), guess_mime(fn))
+        c.execute("UPDATE purchases SET bill_sha256=?, bill_file=NULL WHERE id=?", (sha, pid))
+    # Drop a stored bill once no purchase points at it any more
+    c.execute("""CREATE TRIGGER IF NOT EXISTS trg_purchases_bill_gc AFTER DELETE ON purchases WHEN OLD.bill_sha256 IS NOT NULL BEGIN
+        DELETE FROM attachments WHERE sha256 = OLD.bill_sha256
+            AND NOT EXISTS (SELECT 1 FROM purchases WHERE bill_sha256 = OLD.bill_sha256); END""")
+
+MIGRATIONS = [_m001_indexes, _m002_cascades, _m003_daily_summary, _m004_attachments]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate(conn):
+    """ Bring the DB up to SCHEMA_VERSION in one transaction. Returns the version. """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION: return SCHEMA_VERSION
+    # Table rebuilds must not trip FK checks; the pragma is a no-op inside a transaction
+    conn.execute("PRAGMA foreign_keys=OFF")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the write lock: another session may have migrated meanwhile
+        ver = conn.execute("PRAGMA user_version").fetchone()[0]
+        c = conn.cursor()
+        if ver == 0: _base_schema(c)
+        for n in range(ver, SCHEMA_VERSION):
+            MIGRATIONS[n](c)
+            c.execute(f"PRAGMA user_version={n + 1}")
+        conn.commit()
+    except Exception:
+        conn.rollback(); raise
+    finally:
+        conn.execute(f"PRAGMA foreign_keys={DB_PRAGMAS['foreign_keys']}")
+    return SCHEMA_VERSION
+
+_init_lock = threading.Lock()
+_initialized = False
+
+def init_db(force=False):
+    """ Runs once per process; pass force=True after swapping the DB file. """
+    global _initialized
+    with _init_lock:
+        if _initialized and not force: return
+        _init_db(); _initialized = True
+
+def _init_db():
+    conn = get_conn()
+    migrate(conn)
+    c = conn.cursor()
+    defaults = {'gst_number': '', 'business_address': 'Chennai, Tamil Nadu', 'business_contact': '', 'cgst_percent': '0.0', 'sgst_percent': '0.0', 'expense_categories': 'Rent,Electricity,Salary,Transport,Misc'}
+    for k, v in defaults.items(): c.execute("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", (k, v))
+    
+    admin_check = c.execute("SELECT * FROM app_users WHERE username='admin'").fetchone()
+    if not admin_check:
+        all_perms = ",".join(ALL_PAGES)
+        c.execute("INSERT INTO app_users (username, password_hash, role, permissions) VALUES (?,?,?,?)", ('admin', hash_pass('admin123'), 'Admin', all_perms))
+    conn.commit()
+
+# --- QUERY INSTRUMENTATION ---
+# Optional timing of every run_query call. Off it costs one flag check per
+# query; VSR_QUERY_STATS=1 turns it on at startup and Admins can flip it from
+# Data Inspector -> Performance. Statements are grouped by normalized text.
+_SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """ Whitespace collapsed, literals and IN lists folded to ?, so statements
+    that differ only in their values share one entry. """
+    return _SQL_IN_LIST.sub("(?, ...)", _SQL_LITERAL.sub("?", " ".join(sql.split())))
+
+def explain(conn, sql, params=()):
+    """ EXPLAIN QUERY PLAN as indented lines, like the sqlite3 shell prints it. """
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    depth = {0: -1}
+    for r in rows: depth[r[0]] = depth.get(r[1], -1) + 1
+    return ["  " * depth[r[0]] + r[3] for r in rows]
+
+class QueryStats:
+    """ Process-wide statement statistics: totals per normalized statement,
+    query counts per page rerun and a ring buffer of slow or failed statements
+    with their query plans. Reruns are tracked per script thread; Streamlit
+    runs every rerun (and fragment rerun) on a fresh one. """
+    def __init__(self, enabled=False, slow_ms=100.0, max_log=50, max_runs=100):
+        self.enabled = enabled; self.slow_ms = slow_ms
+        self.stats = {}
+        self.slow_log = deque(maxlen=max_log)
+        self.runs = deque(maxlen=max_runs)
+        self._lock = threading.Lock()
+        self._ctx = threading.local()
+
+    def record(self, conn, sql, params, seconds, rows, error=None):
+        ctx = self._ctx; page = getattr(ctx, 'page', None) or "(app)"
+        key = normalize_sql(sql); ms = seconds * 1000
+        run = getattr(ctx, 'run', None)
+        if run is not None: run['queries'] += 1; run['query_ms'] += ms
+        entry = None
+        if error is not None or ms >= self.slow_ms:
+            entry = {'when': datetime.now().strftime("%H:%M:%S"), 'page': page, 'ms': round(ms, 1), 'rows': rows,
+                     'sql': sql.strip(), 'params': repr(tuple(params))[:300], 'error': str(error) if error is not None else "", 'plan': []}
+            # Planning only re-parses the statement; it never runs it
+            try: entry['plan'] = explain(conn, sql, params) if conn else []
+            except Exception as e: entry['plan'] = [f"(no plan: {e})"]
+        with self._lock:
+            st = self.stats.get(key)
+            if st is None: st = self.stats[key] = {'sql': key, 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'errors': 0, 'pages': set()}
+            st['calls'] += 1; st['total_ms'] += ms; st['max_ms'] = max(st['max_ms'], ms); st['rows'] += max(rows, 0)
+            st['pages'].add(page)
+            if error is not None: st['errors'] += 1
+            if entry: self.slow_log.append(entry)
+
+    @contextmanager
+    def track(self, page):
+        """ Attribute this thread's queries to `page` and log them as one rerun.
+        Yields the run's dict, complete once the block exits. """
+        run = {'when': datetime.now().strftime("%H:%M:%S"), 'page': page, 'queries': 0, 'query_ms': 0.0, 'total_ms': 0.0}
+        ctx = self._ctx; ctx.page = page; ctx.run = run; t0 = time.perf_counter()
+        try: yield run
+        finally:
+            run['total_ms'] = (time.perf_counter() - t0) * 1000; ctx.page = None; ctx.run = None
+            if self.enabled:
+                with self._lock: self.runs.append(run)
+
+    def top(self, n=20):
+        """ The n statements (all if None) with the most total time, as plain dicts. """
+        with self._lock:
+            rows = [dict(s, pages=", ".join(sorted(s['pages'])), avg_ms=s['total_ms'] / s['calls']) for s in self.stats.values()]
+        return sorted(rows, key=lambda r: r['total_ms'], reverse=True)[:n]
+
+    def reset(self):
+        with self._lock: self.stats.clear(); self.slow_log.clear(); self.runs.clear()
+
+QUERY_STATS = QueryStats(enabled=os.environ.get('VSR_QUERY_STATS', '') not in ('', '0'),
+                         slow_ms=float(os.environ.get('VSR_SLOW_MS', 100)))
+
+def run_query(query, params=(), fetch=False):
+    conn = None
+    stats = QUERY_STATS if QUERY_STATS.enabled else None
+    t0 = time.perf_counter() if stats else 0
+    try:
+        conn = get_conn()
+        c = conn.cursor()
+        c.execute(query, params)
+        if fetch: 
+            rows = c.fetchall() # Returns list of Row objects (or empty list)
+            if stats: stats.record(conn, query, params, time.perf_counter() - t0, len(rows))
+            return rows
+        lid = c.lastrowid
+        conn.commit()
+        if stats: stats.record(conn, query, params, time.perf_counter() - t0, c.rowcount)
+        return lid
+    except Exception as e:
+        # Shared connection: never leave a half-done transaction behind
+        if conn and conn.in_transaction: conn.rollback()
+        # Errors are swallowed below; the stats keep them visible
+        if stats: stats.record(conn, query, params, time.perf_counter() - t0, 0, error=e)
+        if fetch: return [] # CRITICAL FIX: Return empty list, NEVER None
+        return None
+
+@contextmanager
+def transaction():
+    """ Unit of work on the shared connection: yields a cursor, commits on success,
+    rolls everything back on any error. Use the cursor, not run_query, inside. """
+    conn = get_conn()
+    if conn.in_transaction: conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn.cursor()
+        conn.commit()
+    except BaseException:
+        conn.rollback(); raise
+
+# --- SAFETY HELPER (Fixes TypeError: NoneType is not subscriptable) ---
+def safe_get(data, default=0):
+    """ Safely extracts the first column of the first row from a query result. """
+    # data is expected to be a list of sqlite3.Row objects
+    # if data is None or empty list [], return default
+    if data and len(data) > 0 and data[0]:
+        # data[0] is the first row. data[0][0] is the first column.
+        val = data[0][0]
+        return val if val is not None else default
+    return default
+
+def get_setting(key):
+    res = run_query("SELECT value FROM settings WHERE key=?", (key,), fetch=True)
+    return res[0]['value'] if res else ""
+
+def update_setting(key, value):
+    run_query("INSERT OR REPLACE INTO settings (key, value) VALUES (?,?)", (key, str(value)))
+
+# --- HELPERS ---
+@lru_cache(maxsize=1)
+def _cipher():
+    from cryptography.fernet import Fernet  # only the Password Manager needs it
+    return Fernet(SYSTEM_KEY)
+
+def encrypt_val(text): return _cipher().encrypt(text.encode()).decode()
+def decrypt_val(enc_text): return _cipher().decrypt(enc_text.encode()).decode()
+
+def get_stock(item_id, opening):
+    bal = safe_get(run_query("SELECT added - sold FROM item_stock WHERE item_id=?", (item_id,), fetch=True))
+    return opening + bal
+
+def get_stock_totals():
+    """ (total qty, total value at cost) across all items in one query. """
+    res = run_query(f"SELECT SUM(stock), SUM(stock * cost_price) FROM ({ITEMS_WITH_STOCK})", fetch=True)
+    if res and res[0]: return (res[0][0] or 0), (res[0][1] or 0)
+    return 0, 0
+
+def get_customer_due(cust_id, opening):
+    bal = safe_get(run_query("SELECT invoiced - paid FROM customer_balances WHERE customer_id=?", (cust_id,), fetch=True))
+    return opening + bal
+
+def get_customer_dues(cust_id=None, min_due=1):
+    """ Customers owing more than min_due, largest first, in one query. """
+    where = "WHERE due > ?" + (" AND id = ?" if cust_id else "")
+    params = (min_due, cust_id) if cust_id else (min_due,)
+    return run_query(f"SELECT * FROM ({CUSTOMER_DUES}) {where} ORDER BY due DESC", params, fetch=True)
+
+# --- PROFIT & LOSS ENGINE ---
+@dataclass
+class PnL:
+    """ Profit & loss for a date range / customer. Revenue is taxable value (sub_total). """
+    date_from: date = None
+    date_to: date = None
+    customer_id: int = None
+    gross_sales: float = 0.0           # grand_total incl. GST
+    revenue: float = 0.0               # sub_total (taxable)
+    cogs: float = 0.0
+    expenses: list = field(default_factory=list)   # [{'category', 'total'}]
+
+    @property
+    def gross_profit(self): return self.revenue - self.cogs
+    @property
+    def total_expenses(self): return sum(e['total'] for e in self.expenses)
+    @property
+    def net_profit(self): return self.gross_profit - self.total_expenses
+
+    def to_rows(self):
+        """ Statement lines as [{'Category', 'Amount'}] for CSV/Excel export. """
+        rows = [{"Category": "Revenue", "Amount": self.revenue}, {"Category": "COGS", "Amount": -self.cogs}, {"Category": "Gross Profit", "Amount": self.gross_profit}]
+        for e in self.expenses: rows.append({"Category": f"Exp: {e['category']}", "Amount": -e['total']})
+        rows.append({"Category": "NET PROFIT", "Amount": self.net_profit})
+        return rows
+
+def compute_pnl(date_from=None, date_to=None, customer_id=None):
+    """ One aggregate query: sales totals, COGS via a join (no id lists, so no
+    host-parameter limit) and the expense breakdown. Expenses aren't tied to a
+    customer, so they're left out when customer_id is given. """
+    s_where = "WHERE 1=1"; s_params = []; e_where = "WHERE 1=1"; e_params = []
+    if date_from and date_to:
+        s_where += " AND date BETWEEN ? AND ?"; s_params += [date_from, date_to]
+        e_where += " AND date BETWEEN ? AND ?"; e_params += [date_from, date_to]
+    if customer_id:
+        s_where += " AND customer_id = ?"; s_params.append(customer_id)
+        e_where += " AND 0"
+    rows = run_query(f"""WITH s AS (SELECT id, grand_total, sub_total FROM sales {s_where})
+        SELECT 'sales' AS kind, NULL AS category, SUM(grand_total) AS a, SUM(sub_total) AS b FROM s
+        UNION ALL
+        SELECT 'cogs', NULL, SUM(si.qty * si.cost_per_unit), NULL FROM sale_items si JOIN s ON si.sale_id = s.id
+        UNION ALL
+        SELECT 'expense', category, SUM(amount), NULL FROM expenses {e_where} GROUP BY category""",
+        tuple(s_params + e_params), fetch=True)
+    pnl = PnL(date_from, date_to, customer_id)
+    for r in rows:
+        if r['kind'] == 'sales': pnl.gross_sales = r['a'] or 0; pnl.revenue = r['b'] or 0
+        elif r['kind'] == 'cogs': pnl.cogs = r['a'] or 0
+        else: pnl.expenses.append({'category': r['category'], 'total': r['a'] or 0})
+    return pnl
+
+# --- READ CACHE ---
+class QueryCache:
+    """ Process-wide LRU of computed results, keyed on (key, DB write generation).
+    The generation is PRAGMA data_version read from a dedicated probe connection,
+    which changes whenever any other connection (any thread or process) commits. """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0; self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._probe = None
+
+    def generation(self):
+        with self._lock:
+            if self._probe is None: self._probe = sqlite3.connect(DB_FILE, check_same_thread=False)
+            return self._probe.execute("PRAGMA data_version").fetchone()[0]
+
+    def get(self, key, compute):
+        full_key = (key, self.generation())
+        with self._lock:
+            if full_key in self._data:
+                self.hits += 1; self._data.move_to_end(full_key)
+                return self._data[full_key]
+            self.misses += 1
+        val = compute()
+        with self._lock:
+            self._data[full_key] = val
+            while len(self._data) > self.max_entries: self._data.popitem(last=False)
+        return val
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+_READ_CACHE = QueryCache()
+
+def get_read_cache():
+    return _READ_CACHE
+
+# --- CUSTOM SQL ---
+# Data Inspector's free-form SQL. Reads run on a throwaway read-only connection
+# that also cannot attach databases: mode=ro alone still lets ATTACH create a
+# file and VACUUM INTO write a full copy. Anything refused there goes to the
+# confirmed write path. Both paths are interrupted by a progress-handler
+# deadline, and reads stop at a row cap.
+SQL_TIME_LIMIT = 10.0    # seconds
+SQL_ROW_CAP = 5000
+SQL_FETCH = 500          # rows per fetchmany
+
+def open_readonly(path=None):
+    """ New mode=ro connection; any write fails with 'attempt to write a readonly database'. """
+    conn = sqlite3.connect(Path(path or DB_FILE).resolve().as_uri() + "?mode=ro", uri=True)
+    conn.execute(f"PRAGMA busy_timeout={DB_PRAGMAS['busy_timeout']}")
+    return conn
+
+def _deadline(conn, seconds):
+    end = time.perf_counter() + seconds
+    # Called every N VM steps; a true return aborts the statement ("interrupted")
+    conn.set_progress_handler(lambda: time.perf_counter() > end, 10000)
+
+@dataclass
+class SqlResult:
+    """ Outcome of a custom statement. `truncated` means rows stopped at the cap. """
+    columns: list = field(default_factory=list)
+    rows: list = field(default_factory=list)
+    truncated: bool = False
+    changes: int = 0
+    elapsed: float = 0.0
+    plan: list = field(default_factory=list)
+    error: str = ""
+    needs_write: bool = False
+
+def _sql_error(e, limit):
+    msg = str(e)
+    if msg == "interrupted": return f"Stopped: still running after {limit:g} s"
+    return msg
+
+def run_readonly_sql(sql, row_cap=SQL_ROW_CAP, time_limit=SQL_TIME_LIMIT):
+    """ One statement on a fresh read-only connection, read in SQL_FETCH batches up to row_cap. """
+    res = SqlResult(); t0 = time.perf_counter()
+    conn = open_readonly()
+    try:
+        # ATTACH and VACUUM INTO open a second database; allow none here
+        conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 0)
+        _deadline(conn, time_limit)
+        try: res.plan = explain(conn, sql)
+        except sqlite3.Error: pass
+        cur = conn.execute(sql)
+        res.columns = [d[0] for d in cur.description or ()]
+        while len(res.rows) < row_cap:
+            batch = cur.fetchmany(min(SQL_FETCH, row_cap - len(res.rows)))
+            if not batch: break
+            res.rows.extend(batch)
+        res.truncated = bool(res.columns) and len(res.rows) >= row_cap and cur.fetchone() is not None
+    except sqlite3.Error as e:
+        res.error = _sql_error(e, time_limit)
+        res.needs_write = "readonly database" in res.error or "too many attached databases" in res.error
+    finally:
+        conn.close()
+    res.elapsed = time.perf_counter() - t0
+    return res
+
+# VACUUM (and VACUUM INTO) refuses to run inside a transaction; it is atomic on its own
+_SQL_VACUUM = re.compile(r"(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*VACUUM\b", re.I | re.S)
+
+def run_write_sql(sql, time_limit=SQL_TIME_LIMIT):
+    """ One write statement in its own transaction on the shared connection;
+    rolled back on error or when it overruns time_limit. VACUUM runs on its
+    own, outside a transaction, under the same time limit. """
+    res = SqlResult(); t0 = time.perf_counter()
+    conn = get_conn()
+    try:
+        try: res.plan = explain(conn, sql)
+        except sqlite3.Error: pass
+        _deadline(conn, time_limit)
+        if _SQL_VACUUM.match(sql):
+            if conn.in_transaction: conn.commit()
+            conn.execute(sql)
+        else:
+            with transaction() as c: c.execute(sql); res.changes = max(c.rowcount, 0)
+    except sqlite3.Error as e:
+        res.error = _sql_error(e, time_limit)
+    finally:
+        conn.set_progress_handler(None, 0)
+    res.elapsed = time.perf_counter() - t0
+    return res
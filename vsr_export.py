@@ -0,0 +1,106 @@
+""" Streaming report export: CSV, Parquet and XLSX writers fed from a cursor in
+chunks, so memory stays flat whatever the row count.
+
+Kept free of Streamlit; pyarrow (Parquet) and xlsxwriter (XLSX) load on first use. """
+import csv
+import time
+from vsr_db import open_readonly
+
+EXPORT_FORMATS = {"CSV": ".csv", "Parquet": ".parquet", "Excel (XLSX)": ".xlsx"}
+EXPORT_MIME = {".csv": "text/csv", ".parquet": "application/vnd.apache.parquet",
+               ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}
+EXPORT_CHUNK = 5000
+XLSX_MAX_ROWS = 1048576  # Excel's per-sheet limit, header included
+
+class CsvExport:
+    def __init__(self, path, columns):
+        # utf-8-sig so Excel opens ₹ and Tamil names correctly
+        self.f = open(path, "w", newline="", encoding="utf-8-sig"); self.w = csv.writer(self.f)
+        self.w.writerow(columns)
+
+    def write(self, rows): self.w.writerows(rows)
+
+    def close(self): self.f.close()
+
+class ParquetExport:
+    """ One row group per chunk. Column types come from the first chunk;
+    SQLite is loosely typed, so later values are coerced to match. """
+    def __init__(self, path, columns):
+        import pyarrow as pa  # ships with streamlit
+        import pyarrow.parquet as pq
+        self.pa, self.pq, self.path, self.columns = pa, pq, path, columns
+        self.schema = self.w = None
+
+    def _coerce(self, name, vals, typ):
+        pa = self.pa
+        if pa.types.is_string(typ): return [None if v is None else str(v) for v in vals]
+        if pa.types.is_floating(typ): return [None if v is None else float(v) for v in vals]
+        if pa.types.is_integer(typ):
+            out = []
+            for v in vals:
+                if isinstance(v, float) and v.is_integer(): v = int(v)
+                elif v is not None and not isinstance(v, int):
+                    raise ValueError(f"column {name!r} mixes integers with {v!r}; export as CSV instead")
+                out.append(v)
+            return out
+        return vals
+
+    def write(self, rows):
+        pa = self.pa; cols = list(zip(*rows))
+        if self.schema is None:
+            fields = []
+            for name, vals in zip(self.columns, cols):
+                try: typ = pa.array(vals).type
+                except (pa.ArrowInvalid, pa.ArrowTypeError): typ = pa.string()
+                if pa.types.is_null(typ): typ = pa.string()  # all NULL so far; keep later values as text
+                elif pa.types.is_integer(typ) and any(isinstance(v, float) for v in vals): typ = pa.float64()
+                fields.append(pa.field(name, typ))
+            self.schema = pa.schema(fields); self.w = self.pq.ParquetWriter(self.path, self.schema)
+        arrays = [pa.array(self._coerce(f.name, vals, f.type), type=f.type) for f, vals in zip(self.schema, cols)]
+        self.w.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        if self.w is None:  # no rows: still write a readable file with the headers
+            self.w = self.pq.ParquetWriter(self.path, self.pa.schema([self.pa.field(c, self.pa.string()) for c in self.columns]))
+        self.w.close()
+
+class XlsxExport:
+    """ constant_memory workbook: each row is flushed to disk once written.
+    Rows past Excel's sheet limit continue on a new sheet. """
+    def __init__(self, path, columns):
+        try: import xlsxwriter
+        except ImportError: raise RuntimeError("Excel export needs XlsxWriter (pip install XlsxWriter)") from None
+        self.wb = xlsxwriter.Workbook(path, {"constant_memory": True})
+        self.columns, self.ws, self.row, self.sheets = columns, None, XLSX_MAX_ROWS, 0
+
+    def write(self, rows):
+        for r in rows:
+            if self.row >= XLSX_MAX_ROWS:
+                self.sheets += 1; self.ws = self.wb.add_worksheet(f"Sheet{self.sheets}")
+                self.ws.write_row(0, 0, self.columns); self.row = 1
+            self.ws.write_row(self.row, 0, r); self.row += 1
+
+    def close(self):
+        if self.ws is None: self.wb.add_worksheet().write_row(0, 0, self.columns)
+        self.wb.close()
+
+WRITERS = {".csv": CsvExport, ".parquet": ParquetExport, ".xlsx": XlsxExport}
+
+def export_query(sql, params, ext, out, progress=None, chunk=EXPORT_CHUNK):
+    """ Stream `sql` into `out` as `ext` (.csv/.parquet/.xlsx). Reads run on a
+    private read-only connection, so a long export never holds the shared one
+    or blocks writers (WAL). progress(rows, rows_per_sec) runs after each chunk.
+    Returns (rows, seconds). """
+    conn = open_readonly(); t0 = time.perf_counter(); n = 0
+    try:
+        cur = conn.execute(sql, tuple(params))
+        w = WRITERS[ext](out, [d[0] for d in cur.description])
+        try:
+            while True:
+                rows = cur.fetchmany(chunk)
+                if not rows: break
+                w.write(rows); n += len(rows)
+                if progress: progress(n, n / max(time.perf_counter() - t0, 1e-6))
+        finally: w.close()
+    finally: conn.close()
+    return n, time.perf_counter() - t0
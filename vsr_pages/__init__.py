@@ -0,0 +1,15 @@
+""" Page registry: every entry of ALL_PAGES maps to a module in this package
+exposing render(). Modules are imported on first visit and then stay loaded
+for the life of the process, so a session only pays for the pages it opens. """
+import importlib
+from vsr_db import ALL_PAGES
+
+PAGE_MODULES = {
+    "Dashboard": "dashboard", "Sales & Billing": "sales", "Purchases": "purchases", "Expenses": "expenses",
+    "Inventory Items": "inventory", "Customers": "customers", "Staff Work": "staff_work", "Reports": "reports",
+    "Print Stickers": "stickers", "Password Manager": "passwords", "Data Inspector": "inspector", "Settings": "settings",
+}
+assert set(PAGE_MODULES) == set(ALL_PAGES)
+
+def load_page(name):
+    return importlib.import_module(f"{__name__}.{PAGE_MODULES[name]}")
@@ -0,0 +1,29 @@
+""" Customers page. """
+import streamlit as st
+from vsr_db import run_query
+from vsr_ui import data_grid
+
+def render():
+    with st.expander("Add Customer", expanded=True):
+        n = st.text_input("Name", key="cust_n"); p = st.text_input("Phone", key="cust_p"); a = st.text_area("Addr", key="cust_a"); od = st.number_input("Op Due", 0.0, key="cust_o")
+        if st.button("Save", key="cust_s"): run_query("INSERT INTO customers (name, phone, address, opening_due) VALUES (?,?,?,?)", (n,p,a,od)); st.rerun()
+    cid = data_grid("cust", "SELECT * FROM customers", filter_cols=["name", "phone", "address"],
+                    sort_cols=["id", "name", "opening_due"], descending=False,
+                    column_config={"opening_due": st.column_config.NumberColumn(format="₹%.2f")}, select_key="cust_edit_sel")
+    if cid is not None:
+        with st.expander("Edit / Delete Customer"):
+
+            # RETRIEVE BUTTON ADDED
+            if st.button("⬇️ Retrieve Details", key="cust_retr_btn"):
+                 cust_res = run_query("SELECT * FROM customers WHERE id=?", (cid,), fetch=True)
+                 if cust_res:
+                    st.session_state.edit_cust_data = cust_res[0]
+                 else:
+                    st.error("Customer not found.")
+
+            if 'edit_cust_data' in st.session_state and st.session_state.edit_cust_data and st.session_state.edit_cust_data['id'] == cid:
+                c = st.session_state.edit_cust_data
+                un = st.text_input("Name", c['name'], key="ce_n"); up = st.text_input("Phone", c['phone'], key="ce_p"); ua = st.text_area("Addr", c['address'], key="ce_a")
+                if st.button("Update", key="ce_upd"): run_query("UPDATE customers SET name=?, phone=?, address=? WHERE id=?", (un,up,ua,cid)); st.success("Updated"); del st.session_state.edit_cust_data; st.rerun()
+                if st.button("Delete Customer", key="cust_del_btn"):
+                    run_query("DELETE FROM customers WHERE id=?", (cid,)); st.warning("Deleted"); del st.session_state.edit_cust_data; st.rerun()
@@ -0,0 +1,92 @@
+""" Dashboard page. """
+import streamlit as st
+import pandas as pd
+from datetime import date, timedelta
+from vsr_db import ITEMS_WITH_STOCK, compute_pnl, get_customer_dues, get_read_cache, get_stock_totals, rollup_totals, run_query, safe_get
+
+def dashboard_data(df, dt, cid):
+    """ Every Dashboard number for one filter set, as plain values (safe to cache). """
+    p = []; wh = "WHERE 1=1"
+    if df and dt: wh += " AND date BETWEEN ? AND ?"; p.extend([df, dt])
+    if cid:
+        # Per-customer figures need sale-level rows; the rollup is shop-wide
+        wh += " AND customer_id=?"; p.append(cid)
+        pnl = compute_pnl(df, dt, cid)
+        rng = {'sales_total': pnl.gross_sales, 'taxable_total': pnl.revenue, 'cogs': pnl.cogs, 'expenses': 0}
+        chart = run_query(f"SELECT date, SUM(grand_total) FROM sales {wh} GROUP BY date ORDER BY date", tuple(p), fetch=True)
+    else:
+        rng = rollup_totals(df, dt)
+        chart = run_query(f"SELECT date, sales_total FROM daily_summary {wh} AND sale_count > 0 ORDER BY date", tuple(p), fetch=True)
+    overall = rollup_totals()
+    
+    # SAFE QUERY RETRIEVAL USING safe_get()
+    all_op = safe_get(run_query("SELECT SUM(opening_due) FROM customers", fetch=True))
+
+    today, yday = date.today(), date.today()-timedelta(days=1)
+    pulse = {r['date']: (r['sales_total'], r['expenses']) for r in run_query("SELECT date, sales_total, expenses FROM daily_summary WHERE date IN (?, ?)", (today, yday), fetch=True)}
+
+    used_kg = safe_get(run_query("SELECT SUM(kg_provided) FROM staff_work", fetch=True))
+    total_qty, total_val = get_stock_totals()
+
+    low = run_query(f"SELECT name, color, stock FROM ({ITEMS_WITH_STOCK}) WHERE stock <= 5 ORDER BY stock", fetch=True)
+    return {
+        'sales': rng['sales_total'], 'taxable': rng['taxable_total'], 'cogs': rng['cogs'], 'expenses': rng['expenses'],
+        'pending': (all_op + overall['sales_total']) - overall['payments_received'],
+        'today': pulse.get(str(today), (0, 0)), 'yesterday': pulse.get(str(yday), (0, 0)),
+        'bags': overall['purchase_bags'], 'kg': overall['purchase_kg'], 'used_kg': used_kg, 'stock_qty': total_qty, 'stock_value': total_val,
+        'chart': [tuple(r) for r in chart],
+        'low_stock': [tuple(r) for r in low],
+        'dues': [(c['name'], c['due']) for c in get_customer_dues()],
+    }
+
+def render():
+    cache = get_read_cache()
+    st.write("#### 📊 Financial Overview")
+    c1, c2, c3 = st.columns(3)
+    df = c1.date_input("From", None, key="dash_from"); dt = c2.date_input("To", None, key="dash_to")
+    custs = cache.get(("customer_names",), lambda: [(c['name'], c['id']) for c in run_query("SELECT id, name FROM customers", fetch=True)])
+    cmap = dict(custs); cmap["All Customers"] = None
+    sc = c3.selectbox("Customer", list(cmap.keys()), index=len(cmap)-1, key="dash_cust"); cid = cmap[sc]
+
+    # Everything below is one cached bundle; any committed write invalidates it
+    dd = cache.get(("dashboard", df, dt, cid, date.today()), lambda: dashboard_data(df, dt, cid))
+    sales, taxable_sales, cogs, exp = dd['sales'], dd['taxable'], dd['cogs'], dd['expenses']
+
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Total Sales", f"₹{sales:,.0f}")
+    c2.metric("Gross Profit", f"₹{taxable_sales-cogs:,.0f}")
+    c3.metric("Expenses", f"₹{exp:,.0f}")
+    c4.metric("Net Profit", f"₹{(taxable_sales-cogs)-exp:,.0f}")
+    c5.metric("Pending Payments", f"₹{dd['pending']:,.0f}")
+    st.divider()
+
+    st.write("#### ⚡ Daily Pulse")
+    (ts, te), (ys, ye) = dd['today'], dd['yesterday']
+    d1, d2, d3, d4 = st.columns(4)
+    d1.metric("Sales Today", f"₹{ts:,.0f}"); d2.metric("Expenses Today", f"₹{te:,.0f}")
+    d3.metric("Sales Yesterday", f"₹{ys:,.0f}"); d4.metric("Expenses Yesterday", f"₹{ye:,.0f}")
+    st.divider()
+
+    st.write("#### 🧱 Purchases & Inventory")
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("Total Bags", dd['bags'])
+    m2.metric("Purchased Kg", f"{dd['kg']:.2f}")
+    m3.metric("Remaining Kg", f"{dd['kg'] - dd['used_kg']:.2f}", delta_color="normal")
+    m4.metric("Stock Qty", dd['stock_qty'])
+    m5.metric("Stock Value", f"₹{dd['stock_value']:,.0f}")
+    st.divider()
+
+    if dd['chart']: st.line_chart(pd.DataFrame(dd['chart'], columns=['Date','Sales']).set_index('Date'))
+
+    c_l, c_r = st.columns(2)
+    with c_l:
+        st.subheader("⚠️ Low Stock (<=5)")
+        low = [{"Item": f"{n} {clr}", "Qty": q} for n, clr, q in dd['low_stock']]
+        if low: st.dataframe(pd.DataFrame(low), hide_index=True, use_container_width=True)
+        else: st.success("Stock Healthy")
+    with c_r:
+        st.subheader("💰 Pending Payments")
+        dues = [{"Customer": n, "Due": f"₹{d:,.2f}"} for n, d in dd['dues']]
+        if dues: st.dataframe(pd.DataFrame(dues), hide_index=True, use_container_width=True, column_config={"Due": st.column_config.NumberColumn(format="₹%.2f")})
+        else: st.success("No Dues")
+    st.caption(f"Cache: {cache.hit_ratio():.0%} hit ratio ({cache.hits} hits / {cache.misses} misses)")
@@ -0,0 +1,35 @@
+""" Expenses page. """
+import streamlit as st
+from datetime import datetime, date
+from vsr_db import get_setting, run_query
+from vsr_ui import data_grid
+
+def render():
+    cats = get_setting("expense_categories").split(',')
+    with st.expander("Add Expense", expanded=True):
+        d = st.date_input("Date", date.today(), key="exp_date"); cat = st.selectbox("Category", cats, key="exp_cat"); desc = st.text_input("Desc", key="exp_desc"); amt = st.number_input("Amount", 0.0, key="exp_amt")
+        if st.button("Save", key="exp_save"): run_query("INSERT INTO expenses (date, category, description, amount) VALUES (?,?,?,?)", (d, cat, desc, amt)); st.rerun()
+    eid = data_grid("exp", "SELECT * FROM expenses", filter_cols=["date", "category", "description"],
+                    sort_cols=["date", "id", "category", "amount"], sort_col="date",
+                    column_config={"amount": st.column_config.NumberColumn(format="₹%.2f")}, select_key="exp_del_sel")
+    if eid is not None:
+        with st.expander("Edit / Delete Expense"):
+
+            # RETRIEVE BUTTON ADDED
+            if st.button("⬇️ Retrieve Details", key="exp_retr_btn"):
+                 exp_res = run_query("SELECT * FROM expenses WHERE id=?", (eid,), fetch=True)
+                 if exp_res:
+                    st.session_state.edit_exp_data = exp_res[0]
+                 else:
+                    st.error("Expense not found.")
+
+            if 'edit_exp_data' in st.session_state and st.session_state.edit_exp_data and st.session_state.edit_exp_data['id'] == eid:
+                e_dat = st.session_state.edit_exp_data
+                ud = st.date_input("Edit Date", datetime.strptime(e_dat['date'], '%Y-%m-%d'), key="e_ed_d")
+                udesc = st.text_input("Edit Desc", e_dat['description'], key="e_ed_desc")
+                uamt = st.number_input("Edit Amount", e_dat['amount'], key="e_ed_amt")
+
+                if st.button("Update Expense", key="e_upd_btn"):
+                    run_query("UPDATE expenses SET date=?, description=?, amount=? WHERE id=?", (ud, udesc, uamt, eid)); st.success("Updated"); del st.session_state.edit_exp_data; st.rerun()
+                if st.button("Delete Expense", key="exp_del_btn"): 
+                    run_query("DELETE FROM expenses WHERE id=?", (eid,)); st.warning("Deleted"); del st.session_state.edit_exp_data; st.rerun()
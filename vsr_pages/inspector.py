@@ -0,0 +1,135 @@
+""" Data Inspector page. """
+import streamlit as st
+import pandas as pd
+from vsr_db import QUERY_STATS, SQL_ROW_CAP, SQL_TIME_LIMIT, get_conn, get_read_cache, run_query, run_readonly_sql, run_write_sql, safe_get
+from vsr_ui import data_grid
+
+# --- TABLE BROWSER ---
+# One keyset page at a time, keyed on rowid; BLOB columns come back as their
+# length and the bytes are read only when a download is clicked.
+BROWSE_CAP = 10000  # filtered row counts stop here instead of scanning on
+
+def qi(name):
+    """ Quoted SQL identifier. """
+    return '"' + name.replace('"', '""') + '"'
+
+def table_columns(table):
+    """ [(column, declared type)] in table order. """
+    return [(r['name'], (r['type'] or '').upper()) for r in run_query(f"PRAGMA table_info({qi(table)})", fetch=True)]
+
+def approx_row_count(table):
+    """ Rows estimated from the rowid range: two index seeks, no scan (high after deletes). """
+    r = run_query(f"SELECT MIN(rowid), MAX(rowid) FROM {qi(table)}", fetch=True)
+    return r[0][1] - r[0][0] + 1 if r and r[0][0] is not None else 0
+
+def browse_sql(table, cols):
+    sel = ['rowid AS "__rowid"'] + [f"length({qi(c)}) AS {qi(c)}" if 'BLOB' in t else qi(c) for c, t in cols]
+    return f"SELECT {', '.join(sel)} FROM {qi(table)}"
+
+def blob_bytes(table, col, rowid):
+    r = run_query(f"SELECT {qi(col)} FROM {qi(table)} WHERE rowid=?", (rowid,), fetch=True)
+    v = r[0][0] if r else None
+    return b"" if v is None else v.encode() if isinstance(v, str) else bytes(v)
+
+def browse_table(table):
+    cols = table_columns(table)
+    blobs = [c for c, t in cols if 'BLOB' in t]
+    m1, m2 = st.columns(2)
+    m1.metric("Rows (approx.)", f"≈ {approx_row_count(table):,}")
+    if m2.button("Exact count", key=f"insp_cnt_{table}"):
+        m2.metric("Rows (exact)", f"{safe_get(run_query(f'SELECT COUNT(*) FROM {qi(table)}', fetch=True)):,}")
+    names = [c for c, _ in cols]
+    fcols = st.multiselect("Filter columns", names, key=f"insp_fc_{table}")
+    rid = data_grid(f"insp_{table}", browse_sql(table, cols), labels={"__rowid": "rowid", **{c: f"{c} (bytes)" for c in blobs}},
+                    filter_cols=fcols, sort_cols=["__rowid"] + names, sort_col="__rowid", descending=False,
+                    key_col="__rowid", count_cap=BROWSE_CAP, select_label="Row (rowid) for BLOB download" if blobs else None,
+                    select_key=f"insp_row_{table}")
+    if rid is not None:
+        dl = st.columns(len(blobs))
+        for col, c in zip(dl, blobs):
+            col.download_button(f"⬇️ {c} of row {rid}", data=lambda c=c: blob_bytes(table, c, rid),
+                                file_name=f"{table}_{rid}_{c}.bin", key=f"insp_dl_{table}_{c}")
+
+def render():
+    if st.session_state.user['role'] == 'Admin':
+        st.markdown("### 🔍 Data Inspector")
+        conn = get_conn()
+        t_list = [r['name'] for r in run_query("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name", fetch=True)]
+        if t_list:
+            sel_table = st.selectbox("Select Table", t_list)
+            if sel_table:
+                schema = pd.read_sql(f"PRAGMA table_info({qi(sel_table)})", conn)
+                with st.expander("Show Schema"): st.dataframe(schema)
+                browse_table(sel_table)
+        else: st.warning("No tables found.")
+        st.divider()
+        st.subheader("2. Run Custom SQL")
+        query = st.text_area("SQL Query", "SELECT * FROM sales LIMIT 5")
+        o1, o2 = st.columns(2)
+        row_cap = o1.number_input("Row cap", 1, 100000, SQL_ROW_CAP, step=500, key="sql_cap")
+        limit = o2.number_input("Time limit (seconds)", 1.0, 300.0, SQL_TIME_LIMIT, step=5.0, key="sql_limit")
+        if st.button("Run Query"):
+            # Always tried read-only first; a write is only detected, never applied, here
+            res = run_readonly_sql(query, row_cap, limit)
+            st.session_state.sql_pending = query if res.needs_write else None
+            st.session_state.pop("sql_confirm", None)
+            show_sql_result(res)
+        pending = st.session_state.get("sql_pending")
+        if pending:
+            st.warning("This statement changes data. Confirm to run it on the live database in a transaction; it is rolled back on any error or when it overruns the time limit.")
+            st.code(pending, language="sql")
+            ok = st.checkbox("I am an Admin and want to apply this change", key="sql_confirm")
+            w1, w2 = st.columns(2)
+            if w1.button("Run Write", type="primary", disabled=not ok, key="sql_write"):
+                st.session_state.sql_pending = None
+                show_sql_result(run_write_sql(pending, limit))
+            if w2.button("Cancel", key="sql_cancel"): st.session_state.sql_pending = None; st.rerun()
+        st.divider()
+        performance_panel()
+    else: st.error("Access Denied")
+
+def show_sql_result(res):
+    if res.needs_write: st.info("Not run: the read-only connection refused a write.")
+    elif res.error: st.error(f"Error: {res.error}")
+    elif res.columns:
+        st.dataframe(pd.DataFrame.from_records(res.rows, columns=res.columns), hide_index=True)
+        st.caption(f"{len(res.rows):,} rows" + (" (row cap reached; the rest were not read)" if res.truncated else "") + f" · {res.elapsed * 1000:,.0f} ms")
+    else: st.success(f"Query Executed Successfully · {res.changes:,} rows changed · {res.elapsed * 1000:,.0f} ms")
+    if res.plan:
+        with st.expander("Query plan"): st.code("\n".join(res.plan), language="text")
+
+def performance_panel():
+    """ Query statistics from run_query: top statements, recent reruns, slow log. """
+    st.subheader("3. Performance")
+    qs = QUERY_STATS
+    c1, c2, c3 = st.columns([1, 1, 1])
+    # QUERY_STATS is process-wide: show its current values and write back only
+    # from a change callback, so no other Admin's rerun can overwrite them
+    st.session_state.perf_on = qs.enabled; st.session_state.perf_slow = float(qs.slow_ms)
+    c1.toggle("Record query stats", key="perf_on", help="Times every run_query call in this process. Small overhead while on.",
+              on_change=lambda: setattr(qs, 'enabled', st.session_state.perf_on))
+    c2.number_input("Slow query threshold (ms)", 0.0, 60000.0, step=10.0, key="perf_slow",
+                    on_change=lambda: setattr(qs, 'slow_ms', st.session_state.perf_slow))
+    if c3.button("Reset stats", key="perf_reset"): qs.reset()
+    allq = qs.top(None); top = allq[:25]
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Statements recorded", f"{sum(r['calls'] for r in allq):,}"); m2.metric("SQL time", f"{sum(r['total_ms'] for r in allq):,.0f} ms")
+    m3.metric("Read cache hit ratio", f"{get_read_cache().hit_ratio():.0%}")
+    if not top:
+        st.info("No queries recorded yet. Switch recording on and open a few pages." if not qs.enabled else "No queries recorded yet.")
+        return
+    st.write("**Top queries by total time**")
+    ms = st.column_config.NumberColumn(format="%.1f")
+    st.dataframe([{k: r[k] for k in ('total_ms', 'calls', 'avg_ms', 'max_ms', 'rows', 'errors', 'pages', 'sql')} for r in top],
+                 hide_index=True, use_container_width=True,
+                 column_config={"total_ms": ms, "avg_ms": ms, "max_ms": ms, "sql": st.column_config.TextColumn("statement", width="large")})
+    if qs.runs:
+        st.write("**Recent page reruns**")
+        st.dataframe([dict(r, query_ms=round(r['query_ms'], 1), total_ms=round(r['total_ms'], 1)) for r in reversed(qs.runs)], hide_index=True, use_container_width=True)
+    st.write(f"**Slow or failed statements** (≥ {qs.slow_ms:.0f} ms, last {qs.slow_log.maxlen})")
+    if not qs.slow_log: st.caption("None so far.")
+    for e in reversed(qs.slow_log):
+        with st.expander(f"{e['when']} · {e['page']} · {e['ms']:.0f} ms · {e['rows']} rows" + (" · ERROR" if e['error'] else "")):
+            if e['error']: st.error(e['error'])
+            st.code(e['sql'], language="sql"); st.caption(f"params: {e['params']}")
+            if e['plan']: st.code("\n".join(e['plan']), language="text")
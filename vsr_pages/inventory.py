@@ -0,0 +1,165 @@
+""" Inventory Items page. """
+import streamlit as st
+import pandas as pd
+from datetime import date
+from vsr_db import ITEMS_WITH_STOCK, get_stock_totals, run_query
+
+# --- INVENTORY QUERIES ---
+RECENT_LOGS = """
+    SELECT sl.date, i.name, i.color, sl.qty_added, sl.notes 
+    FROM stock_logs sl 
+    JOIN items i ON sl.item_id = i.id 
+    ORDER BY sl.date DESC LIMIT 50
+"""
+
+def inventory_metrics():
+    """ (unique items, total stock qty, stock value at cost) for the header. """
+    tot_items_res = run_query("SELECT COUNT(*) FROM items", fetch=True)
+    tot_items = tot_items_res[0][0] if tot_items_res and tot_items_res[0][0] else 0
+    return (tot_items, *get_stock_totals())
+
+def stock_rows(search_q=""):
+    """ Items whose name or color matches, with live stock (search + stock resolved in SQL). """
+    like = f"%{search_q}%"
+    return run_query(f"SELECT * FROM ({ITEMS_WITH_STOCK}) WHERE name LIKE ? OR color LIKE ? ORDER BY id", (like, like), fetch=True)
+
+def render():
+    # ----------------------------------------------------
+    # INVENTORY PAGE WITH FEATURES
+    # ----------------------------------------------------
+
+    # 1. METRICS DASHBOARD
+    tot_items, total_qty, total_val = inventory_metrics()
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Total Unique Items", tot_items)
+    m2.metric("Total Stock Qty", total_qty)
+    m3.metric("Inventory Value (Cost)", f"₹{total_val:,.0f}")
+    st.divider()
+
+    # 2. TABS
+    inv_t1, inv_t2 = st.tabs(["📦 Manage Inventory", "📜 Stock History Log"])
+
+    with inv_t1:
+        # --- ADD / UPDATE SECTION ---
+        with st.expander("➕ Add / Update Stock", expanded=False):
+            c1, c2, c3 = st.columns(3)
+            st_date = c1.date_input("Date", date.today(), key="stk_date")
+
+            # Master Name Selection + Quick Add
+            m_names = run_query("SELECT name FROM master_names", fetch=True)
+            name_list = [m['name'] for m in m_names] if m_names else []
+
+            # Layout for Name selection
+            n_col, new_n_col = st.columns([2, 1])
+            with n_col:
+                n = st.selectbox("Item Name", name_list, key="inv_name") if name_list else None
+            with new_n_col:
+                # Mini-form to add name
+                with st.popover("➕ New Name"):
+                    new_m_name = st.text_input("Name")
+                    if st.button("Add"):
+                        try:
+                            run_query("INSERT INTO master_names (name) VALUES (?)", (new_m_name,))
+                            st.success("Added!")
+                            st.rerun()
+                        except: st.error("Exists")
+
+            if not n and not name_list:
+                st.warning("Please add an Item Name using the button above.")
+
+            cl = c2.text_input("Color", key="inv_color")
+            c4, c5 = st.columns(2)
+            op = c4.number_input("Qty to Add", 1, key="inv_qty")
+            cp = c5.number_input("Cost Price", 0.0, key="inv_cp")
+            # Removed SP input
+
+            if st.button("Save Stock", key="inv_save") and n:
+                exist = run_query("SELECT id, opening_stock FROM items WHERE name=? AND color=?", (n, cl), fetch=True)
+                if exist:
+                    run_query("UPDATE items SET cost_price=? WHERE id=?", (cp, exist[0]['id']))
+                    run_query("INSERT INTO stock_logs (date, item_id, qty_added, notes) VALUES (?,?,?,?)", (st_date, exist[0]['id'], op, "Updated Stock"))
+                    st.success(f"Added {op} to {n} {cl}!")
+                else:
+                    # Pass 0.0 for sell_price as it's not in UI anymore
+                    iid = run_query("INSERT INTO items (name, color, opening_stock, cost_price, sell_price) VALUES (?,?,?,?,0.0)", (n,cl,0,cp))
+                    run_query("INSERT INTO stock_logs (date, item_id, qty_added, notes) VALUES (?,?,?,?)", (st_date, iid, op, "New Item"))
+                    st.success("New Item Created!")
+                st.rerun()
+
+        # --- VIEW & EDIT TABLE ---
+        st.write("### Current Stock")
+        search_q = st.text_input("🔍 Search Items (Name or Color)", "")
+
+        data_rows = []
+        for i in stock_rows(search_q):
+            curr_stock = i['stock']
+            status = "⚠️ Low" if curr_stock <= 5 else "✅ OK"
+            data_rows.append({
+                "ID": i['id'],
+                "Name": i['name'],
+                "Color": i['color'],
+                "Stock": curr_stock,
+                "Cost Price": i['cost_price'],
+                # Removed Sell Price column
+                "Value": curr_stock * i['cost_price'],
+                "Status": status
+            })
+
+        if data_rows:
+            df_inv = pd.DataFrame(data_rows)
+            st.dataframe(
+                df_inv, 
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "Cost Price": st.column_config.NumberColumn(format="₹%.2f"),
+                    "Value": st.column_config.NumberColumn(format="₹%.2f"),
+                }
+            )
+
+            # --- EDIT/DELETE ACTION (FIXED WITH RETRIEVE BUTTON) ---
+            with st.expander("🛠️ Edit / Delete Item"):
+                sel_id = st.selectbox("Select Item ID to Edit", df_inv['ID'], key="inv_edit_id")
+
+                # RETRIEVE BUTTON ADDED HERE
+                if st.button("⬇️ Retrieve Details", key="inv_retr_btn"):
+                    inv_res = run_query("SELECT * FROM items WHERE id=?", (sel_id,), fetch=True)
+                    if inv_res:
+                          st.session_state.edit_inv_data = inv_res[0]
+                    else:
+                        st.error("Item not found.")
+
+                if 'edit_inv_data' in st.session_state and st.session_state.edit_inv_data and st.session_state.edit_inv_data['id'] == sel_id:
+                    item_det = st.session_state.edit_inv_data
+
+                    ec1, ec2, ec3 = st.columns(3)
+                    e_name = ec1.text_input("Name", item_det['name'], key="e_nm")
+                    e_col = ec2.text_input("Color", item_det['color'], key="e_col")
+                    e_cp = ec3.number_input("Cost Price", 0.0, value=float(item_det['cost_price']), key="e_cp")
+
+                    b1, b2 = st.columns(2)
+                    if b1.button("Update Item"):
+                        run_query("UPDATE items SET name=?, color=?, cost_price=? WHERE id=?", (e_name, e_col, e_cp, sel_id))
+                        st.success("Updated!")
+                        del st.session_state.edit_inv_data # Clear state
+                        st.rerun()
+
+                    if b2.button("Delete Item (Permanently)", type="primary"):
+                        run_query("DELETE FROM items WHERE id=?", (sel_id,))
+                        st.warning("Deleted!")
+                        del st.session_state.edit_inv_data
+                        st.rerun()
+
+        else:
+            st.info("No items found.")
+
+    with inv_t2:
+        # --- STOCK LOGS ---
+        st.write("### 📜 Recent Stock Additions")
+        logs = run_query(RECENT_LOGS, fetch=True)
+
+        if logs:
+            st.dataframe(pd.DataFrame([dict(r) for r in logs]), use_container_width=True)
+        else:
+            st.info("No history logs yet.")
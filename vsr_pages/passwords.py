@@ -0,0 +1,51 @@
+""" Password Manager page. """
+import streamlit as st
+from datetime import date
+from vsr_db import ALL_PAGES, decrypt_val, encrypt_val, hash_pass, run_query
+
+def render():
+    if st.session_state.user['role'] == 'Admin':
+        st.markdown("### 👥 Admin User Management")
+        t1, t2 = st.tabs(["Create User", "Edit User"])
+        with t1:
+            c1, c2, c3 = st.columns(3)
+            nu = c1.text_input("New User", key="pm_nu"); np = c2.text_input("Password", type="password", key="pm_np"); nr = c3.selectbox("Role", ["Staff", "Admin"], key="pm_nr")
+            perms = st.multiselect("Access", ALL_PAGES, default=["Sales & Billing"], key="pm_perms")
+            if st.button("Create", key="pm_create"):
+                try:
+                    run_query("INSERT INTO app_users (username, password_hash, role, permissions) VALUES (?,?,?,?)", (nu, hash_pass(np), nr, ",".join(perms))); st.success("User Created")
+                except: st.error("Exists")
+        with t2:
+            usrs = run_query("SELECT * FROM app_users", fetch=True)
+            u_map = {u['username']: u for u in usrs}
+            sel_u = st.selectbox("Select User to Edit", list(u_map.keys()), key="pm_edit_sel")
+            if sel_u:
+                curr_u = u_map[sel_u]
+                curr_perms_list = curr_u['permissions'].split(",") if curr_u['permissions'] else []
+                valid_defaults = [p for p in curr_perms_list if p in ALL_PAGES]
+                c_role = st.selectbox("Role", ["Staff", "Admin"], index=0 if curr_u['role']=="Staff" else 1, key=f"pm_role_{sel_u}")
+                c_perms = st.multiselect("Access", ALL_PAGES, default=valid_defaults, key=f"pm_perms_{sel_u}")
+                new_pass = st.text_input("Reset Password (Optional)", type="password", key=f"pm_pass_{sel_u}")
+                if st.button("Update User", key="pm_update_btn"):
+                    p_sql = hash_pass(new_pass) if new_pass else curr_u['password_hash']
+                    run_query("UPDATE app_users SET role=?, permissions=?, password_hash=? WHERE id=?", (c_role, ",".join(c_perms), p_sql, curr_u['id'])); st.success("Updated!"); st.rerun()
+        st.divider()
+    st.markdown("### 🔐 Team Vault")
+    with st.expander("➕ Add Secret", expanded=False):
+        c1, c2 = st.columns(2)
+        web = c1.text_input("Site", key="vault_site"); lid = c2.text_input("Login ID", key="vault_lid"); pw = st.text_input("Password", type="password", key="vault_pw")
+        vis = st.radio("Visibility", ["Private", "Shared"], horizontal=True, key="vault_vis")
+        if st.button("Save Secret", key="vault_save"):
+            enc = encrypt_val(pw)
+            run_query("INSERT INTO pm_vault (user_id, type, website, login_id, enc_password, updated_at) VALUES (?,?,?,?,?,?)", (st.session_state.user['id'], vis, web, lid, enc, date.today())); st.success("Saved"); st.rerun()
+    uid = st.session_state.user['id']
+    rows = run_query("SELECT * FROM pm_vault WHERE user_id=? OR type='Shared' ORDER BY id DESC", (uid,), fetch=True)
+    if rows:
+        for r in rows:
+            icon = "🌍" if r['type'] == 'Shared' else "🔒"
+            with st.expander(f"{icon} {r['website']} ({r['login_id']})"):
+                st.code(decrypt_val(r['enc_password']))
+                if st.button("Delete", key=f"del_{r['id']}"):
+                    if r['user_id'] == uid or st.session_state.user['role'] == 'Admin':
+                        run_query("DELETE FROM pm_vault WHERE id=?", (r['id'],)); st.rerun()
+                    else: st.error("Unauthorized")
@@ -0,0 +1,71 @@
+""" Purchases page. """
+import streamlit as st
+from datetime import date
+from vsr_db import get_attachment, guess_mime, put_attachment, run_query, transaction
+from vsr_ui import data_grid
+
+def render():
+    with st.expander("Add Purchase", expanded=True):
+        d = st.date_input("Date", date.today(), key="pur_date"); desc = st.text_input("Desc", key="pur_desc")
+        c1, c2, c3 = st.columns(3)
+        bags = c1.number_input("Bags", 0.0, key="pur_bag"); kg = c2.number_input("KG/Bag", 0.0, key="pur_kg"); rate = c3.number_input("Rate/KG", 0.0, key="pur_rate")
+
+        # Vendor & GST
+        vc1, vc2 = st.columns(2)
+        vname = vc1.text_input("Vendor Name", key="p_vname")
+        vcontact = vc2.text_input("Vendor Contact", key="p_vcontact")
+
+        is_gst = st.toggle("GST Bill?", key="p_isgst")
+        cgst_p = 0.0; sgst_p = 0.0
+        if is_gst:
+            g1, g2 = st.columns(2)
+            cgst_p = g1.number_input("CGST %", 0.0, key="p_cgst")
+            sgst_p = g2.number_input("SGST %", 0.0, key="p_sgst")
+
+        p_file = st.file_uploader("Upload Bill", type=['pdf', 'png', 'jpg'], key="p_up")
+
+        if st.button("Save", key="pur_save"): 
+            total_kg = bags * kg
+            total_amt = total_kg * rate
+            fn = p_file.name if p_file else None
+
+            with transaction() as c:
+                sha = put_attachment(c, p_file.getvalue(), p_file.type or guess_mime(fn)) if p_file else None
+                c.execute("""INSERT INTO purchases (date, description, bags, kg_per_bag, total_kg, price_per_kg, total_amount, 
+                              vendor_name, vendor_contact, is_gst, cgst_percent, sgst_percent, bill_sha256, bill_filename) 
+                              VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)""", 
+                          (d, desc, bags, kg, total_kg, rate, total_amt, vname, vcontact, 1 if is_gst else 0, cgst_p, sgst_p, sha, fn))
+            st.rerun()
+
+    # TABLE VIEW FOR PURCHASES
+    st.write("### Purchase History")
+    pid = data_grid("pur", "SELECT id, date, vendor_name, description, total_amount, bill_filename FROM purchases",
+                    labels={"total_amount": "Total (₹)", "bill_filename": "Attached Bill"},
+                    filter_cols=["date", "vendor_name", "description"], sort_cols=["date", "id", "vendor_name", "total_amount"], sort_col="date",
+                    column_config={"Total (₹)": st.column_config.NumberColumn(format="₹%.2f")},
+                    select_label="Select Purchase ID to View/Delete", select_key="p_sel")
+    if pid is not None:
+        # Action Bar (FIXED WITH RETRIEVE BUTTON)
+        if st.button("⬇️ Retrieve Purchase Details", key="pur_retr_btn"):
+             res = run_query("""SELECT p.id, p.vendor_name, p.vendor_contact, p.is_gst, p.cgst_percent, p.sgst_percent, p.bill_filename, p.bill_sha256, a.mime
+                                FROM purchases p LEFT JOIN attachments a ON a.sha256 = p.bill_sha256 WHERE p.id=?""", (pid,), fetch=True)
+             st.session_state.sel_pur_data = res[0] if res else None
+
+        if 'sel_pur_data' in st.session_state and st.session_state.sel_pur_data and st.session_state.sel_pur_data['id'] == pid:
+            sel = st.session_state.sel_pur_data
+            c1, c2 = st.columns(2)
+            c1.info(f"Vendor: {sel['vendor_name']} | Contact: {sel['vendor_contact']}")
+            if sel['is_gst']:
+                c1.warning(f"GST Included: {sel['cgst_percent']+sel['sgst_percent']}%")
+
+            # Download Button (bytes are fetched only when clicked)
+            if sel['bill_sha256']:
+                sha = sel['bill_sha256']
+                c2.download_button("📥 Download Bill", data=lambda: get_attachment(sha), file_name=sel['bill_filename'] or "bill",
+                                   mime=sel['mime'] or guess_mime(sel['bill_filename']), key=f"dl_bill_{pid}")
+
+            if c2.button("🗑️ Delete Purchase", key=f"del_p_{pid}"):
+                run_query("DELETE FROM purchases WHERE id=?", (pid,))
+                st.success("Deleted")
+                del st.session_state.sel_pur_data
+                st.rerun()
@@ -0,0 +1,122 @@
+""" Reports page. """
+import streamlit as st
+import pandas as pd
+from vsr_db import compute_pnl, get_customer_dues, run_query
+from vsr_ui import export_panel
+
+# --- REPORT QUERIES ---
+def report_sql(tab, df=None, dt=None, cid=None):
+    """ (sql, params) behind a row-listing report tab. Dates filter only when
+    both are set; the customer filter applies to the Sales tab alone. """
+    # General Date Filter for Non-Customer Tabs (Purchases, Expenses, etc.)
+    date_filter = "WHERE date BETWEEN ? AND ?" if (df and dt) else "WHERE 1=1"
+    date_params = (df, dt) if (df and dt) else ()
+    if tab == "Sales":
+        # Specific Sales Filter (Date AND Customer)
+        sales_where = "WHERE 1=1"; sales_params = []
+        if df and dt: sales_where += " AND s.date BETWEEN ? AND ?"; sales_params.extend([df, dt])
+        if cid: sales_where += " AND s.customer_id = ?"; sales_params.append(cid)
+        return f'''SELECT s.*, c.name as customer_name, (s.grand_total - s.paid_amount) as due_amount 
+                   FROM sales s 
+                   LEFT JOIN customers c ON s.customer_id=c.id 
+                   {sales_where}''', tuple(sales_params)
+    if tab == "Purchases":
+        return f"""SELECT id, date, description, bags, kg_per_bag, total_kg, price_per_kg, total_amount, vendor_name, vendor_contact,
+                   is_gst, cgst_percent, sgst_percent, bill_filename FROM purchases {date_filter}""", date_params
+    if tab == "Expenses":
+        return f"SELECT * FROM expenses {date_filter}", date_params
+    if tab == "Staff":
+        return f'''SELECT sw.date, sw.staff_name, sw.kg_provided, 
+                   COALESCE(SUM(swi.qty_produced), 0) as total_pkts, 
+                   GROUP_CONCAT(COALESCE(swi.item_name, i.name, 'Generic') || ' (' || swi.qty_produced || ')', ', ') as details,
+                   'Given: ' || sw.kg_provided || 'kg | Ret: ' || printf("%.2f", COALESCE(SUM(swi.qty_produced * swi.grams)/1000, 0)) || 'kg' as weight_analysis,
+                   sw.total_salary 
+                   FROM staff_work sw 
+                   LEFT JOIN staff_work_items swi ON sw.id = swi.work_id 
+                   LEFT JOIN items i ON swi.item_id = i.id
+                   {date_filter} GROUP BY sw.id''', date_params
+    if tab == "Stock History":
+        return f'''SELECT sl.date, i.name, i.color, sl.qty_added, sl.notes 
+                   FROM stock_logs sl 
+                   JOIN items i ON sl.item_id=i.id 
+                   {date_filter.replace('date', 'sl.date')} ORDER BY sl.date DESC''', date_params
+    raise ValueError(f"no row query for report tab {tab!r}")
+
+def export_report(tab, df, dt, cid=None):
+    """ Full-table export of a report tab with the page's filters. """
+    with st.expander("⬇️ Export full report"):
+        name = tab.replace(" ", "_") + (f"_{df}_to_{dt}" if df and dt else "") + (f"_customer{cid}" if cid else "")
+        export_panel(f"exp_{tab.replace(' ', '_').lower()}", *report_sql(tab, df, dt, cid), name)
+
+MONEY = st.column_config.NumberColumn(format="₹%.2f")
+ROW_TABS = {  # tab -> (column_config, message when empty)
+    "Sales": ({"grand_total": MONEY, "paid_amount": MONEY}, "No Data found for filters."),
+    "Purchases": ({"total_amount": MONEY}, "No Data"),
+    "Expenses": ({"amount": MONEY}, "No Data"),
+    "Staff": ({"total_salary": MONEY, "kg_provided": st.column_config.NumberColumn(format="%.2f kg")}, "No Data"),
+    "Stock History": (None, "No stock logs."),
+}
+TABS = ["Sales", "Purchases", "Expenses", "Dues", "Staff", "Stock History", "Profit & Loss"]
+
+# Each tab body is a fragment: its own widgets (export, downloads) rerun only that tab
+@st.fragment
+def rows_tab(tab, df, dt, cid):
+    # Only Sales has a customer column
+    if cid and tab != "Sales": st.info("Not applicable for specific Customer filter"); return
+    export_report(tab, df, dt, cid)
+    cfg, empty = ROW_TABS[tab]
+    d = run_query(*report_sql(tab, df, dt, cid), fetch=True)
+    if d: st.dataframe(pd.DataFrame([dict(r) for r in d]), column_config=cfg)
+    else: st.info(empty)
+
+@st.fragment
+def dues_tab(df, dt, cid):
+    res = [{"Name": c['name'], "Phone": c['phone'], "Current Due": c['due']} for c in get_customer_dues(cid)]
+    if res: st.dataframe(pd.DataFrame(res), column_config={"Current Due": MONEY})
+    else: st.info("No dues found.")
+
+def pnl_pdf(pnl):
+    from vsr_render import create_pnl_pdf  # fpdf loads with the first download
+    return create_pnl_pdf(pnl)
+
+@st.fragment
+def pnl_tab(df, dt, cid):
+    if cid:
+        st.info("Not applicable for specific Customer filter"); return
+    is_date_filtered = (df is not None and dt is not None)
+    title = f"({df} to {dt})" if is_date_filtered else "(Overall)"
+    st.markdown(f"### 📈 Profit & Loss {title}")
+
+    pnl = compute_pnl(df, dt)
+    rev, cogs, tot_exp, net = pnl.revenue, pnl.cogs, pnl.total_expenses, pnl.net_profit
+
+    c1, c2 = st.columns(2)
+    c1.metric("Revenue (Sales)", f"₹{rev:,.2f}")
+    c1.metric("COGS (Item Cost)", f"- ₹{cogs:,.2f}")
+    c1.markdown("---")
+    c1.metric("Gross Profit", f"₹{pnl.gross_profit:,.2f}")
+
+    c2.write("**Expenses Breakdown**")
+    for e in pnl.expenses: c2.write(f"- {e['category']}: ₹{e['total']:,.2f}")
+    c2.metric("Total Expenses", f"- ₹{tot_exp:,.2f}")
+    c2.markdown("---")
+    st.metric("NET PROFIT", f"₹{net:,.2f}", delta_color="normal")
+
+    # Files are built when a download is clicked, not on every rerun
+    col_a, col_b = st.columns(2)
+    col_a.download_button("📄 Download PDF Statement", lambda p=pnl: pnl_pdf(p), "PnL_Statement.pdf", "application/pdf")
+    col_b.download_button("📊 Download Excel (CSV)", lambda p=pnl: pd.DataFrame(p.to_rows()).to_csv(index=False), "PnL.csv")
+
+def render():
+    c1, c2, c3 = st.columns(3)
+    df = c1.date_input("From", key="rep_from"); dt = c2.date_input("To", key="rep_to"); 
+    custs = run_query("SELECT id, name FROM customers", fetch=True)
+    cmap = {c['name']: c['id'] for c in custs}; cmap["All Customers"] = None
+    sc = c3.selectbox("Filter Customer", list(cmap.keys()), index=len(cmap)-1, key="rep_cust"); cid = cmap[sc]
+    # Tab state is tracked, so only the open tab's body runs; switching tabs reruns
+    for name, tab in zip(TABS, st.tabs(TABS, key="rep_tab", on_change="rerun")):
+        if not tab.open: continue
+        with tab:
+            if name == "Dues": dues_tab(df, dt, cid)
+            elif name == "Profit & Loss": pnl_tab(df, dt, cid)
+            else: rows_tab(name, df, dt, cid)
@@ -0,0 +1,147 @@
+""" Sales & Billing page. """
+import streamlit as st
+import pandas as pd
+from datetime import date
+import os
+import base64
+from urllib.parse import quote
+from vsr_assets import read_bytes
+from vsr_db import get_setting, run_query, transaction
+from vsr_ui import data_grid, export_invoices_zip, invoice_jobs, keep_temp_file, new_temp_file, render_invoice
+
+# --- SALES HISTORY ---
+HISTORY_SQL = """SELECT s.id, s.date, c.name AS customer, s.grand_total, s.paid_amount, (s.grand_total - s.paid_amount) AS balance
+                 FROM sales s LEFT JOIN customers c ON s.customer_id = c.id"""
+
+def with_items(rows):
+    """ Adds the 'items' summary column to one page of history rows. """
+    ph = ",".join("?" * len(rows))
+    its = {r[0]: r[1] for r in run_query(f"""SELECT si.sale_id, GROUP_CONCAT(i.name || ' (' || si.qty || ')', ', ')
+           FROM sale_items si LEFT JOIN items i ON si.item_id = i.id WHERE si.sale_id IN ({ph}) GROUP BY si.sale_id""", tuple(r['id'] for r in rows), fetch=True)}
+    return [{**r, 'items': its.get(r['id'])} for r in rows]
+
+def render():
+    tabs = st.tabs(["New Invoice", "History"])
+    with tabs[0]:
+        if 'cart' not in st.session_state: st.session_state.cart = []
+        c1, c2 = st.columns([2, 1])
+        with c1: 
+            st.subheader("Select Item")
+            items = run_query("SELECT * FROM items", fetch=True)
+            if items:
+                i_map = {f"{i['name']} {i['color']}": i for i in items}
+                sel_lbl = st.selectbox("Search Item", list(i_map.keys()), key="sales_item_sel"); sel_item = i_map[sel_lbl]
+                cq, cb = st.columns([1, 1]); qty = cq.number_input("Qty", 1, key="sales_qty")
+                price_in = cb.number_input("Selling Price (Per Unit)", 0.0, key="sales_price_in")
+                if st.button("Add to Cart", key="sales_add") and price_in > 0:
+                    st.session_state.cart.append({"id": sel_item['id'], "name": sel_item['name'], "color": sel_item['color'], "qty": qty, "price": price_in, "cost": sel_item['cost_price'], "total": qty*price_in})
+            else: st.warning("No items found.")
+        with c2:
+            st.subheader("Billing")
+            custs = run_query("SELECT id, name, phone FROM customers", fetch=True)
+            cmap = {f"{c['name']}": c['id'] for c in custs}; cmap["Walk-in"] = None
+            c_name = st.selectbox("Customer", list(cmap.keys()), key="sales_cust"); c_id = cmap[c_name]; d_inv = st.date_input("Date", date.today(), key="sales_date")
+
+            walkin_mob = ""
+            if c_name == "Walk-in":
+                walkin_mob = st.text_input("Mobile No (Optional)", key="w_mob")
+
+            if st.session_state.cart:
+                df = pd.DataFrame(st.session_state.cart)
+                st.dataframe(df[['name', 'qty', 'price', 'total']], hide_index=True, use_container_width=True, column_config={"total": st.column_config.NumberColumn("Total", format="₹%.2f"), "price": st.column_config.NumberColumn("Price", format="₹%.2f")})
+                grand = df['total'].sum()
+                cp = float(get_setting("cgst_percent")); sp = float(get_setting("sgst_percent")); tr = cp+sp
+                taxable = grand / (1 + (tr/100)) if tr > 0 else grand
+                st.markdown(f"### Total: ₹{grand:,.2f}"); st.caption(f"Taxable: ₹{taxable:,.2f}")
+                paid = st.number_input("Paid", 0.0, value=grand, key="sales_paid"); note = st.text_input("Note", key="sales_note")
+                if st.button("✅ Confirm Sale", type="primary", use_container_width=True, key="sales_confirm"):
+                    try:
+                        # Header, lines and payment land together or not at all
+                        with transaction() as c:
+                            c.execute("INSERT INTO sales (date, customer_id, sub_total, cgst_percent, sgst_percent, cgst_amount, sgst_amount, grand_total, paid_amount, notes, walkin_phone) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                                      (d_inv, c_id, taxable, cp, sp, taxable*(cp/100), taxable*(sp/100), grand, paid, note, walkin_mob))
+                            sid = c.lastrowid
+                            c.executemany("INSERT INTO sale_items (sale_id, item_id, qty, price_per_unit, cost_per_unit) VALUES (?,?,?,?,?)",
+                                          [(sid, x['id'], x['qty'], x['price'], x['cost']) for x in st.session_state.cart])
+                            if paid > 0: c.execute("INSERT INTO payments (date, customer_id, sale_id, amount, note) VALUES (?,?,?,?,?)", (d_inv, c_id, sid, paid, "Sale"))
+                    except Exception as e: st.error(f"Sale not saved: {e}")
+                    else: st.session_state.cart = []; st.success("Saved!"); st.rerun()
+                if st.button("Clear Cart", key="sales_clear"): st.session_state.cart = []; st.rerun()
+
+    with tabs[1]:
+        with st.expander("📦 Bulk Export"):
+            b1, b2 = st.columns(2)
+            bd1 = b1.date_input("From", date.today().replace(day=1), key="bulk_d1"); bd2 = b2.date_input("To", date.today(), key="bulk_d2")
+            if st.button("Export Invoices (ZIP)", key="bulk_go"):
+                jobs = invoice_jobs(str(bd1), str(bd2))
+                if not jobs: st.info("No invoices in this range.")
+                else:
+                    bar = st.progress(0.0, text=f"Rendering {len(jobs)} invoices...")
+                    path = new_temp_file("invoices", ".zip")
+                    try: rate = export_invoices_zip(jobs, path, lambda d, n, r: bar.progress(d / n, text=f"{d}/{n} invoices · {r:.1f}/sec"))
+                    except Exception as e:
+                        os.remove(path); st.error(f"Export failed: {e}")
+                    else:
+                        keep_temp_file('bulk_zip', (path, f"invoices_{bd1}_to_{bd2}.zip", len(jobs), rate))
+            bz = st.session_state.get('bulk_zip')
+            if bz and os.path.exists(bz[0]):
+                st.caption(f"{bz[2]} invoices · {bz[3]:.1f} invoices/sec · {os.path.getsize(bz[0]) / 1024:,.0f} KB")
+                st.download_button("⬇️ Download ZIP", data=lambda p=bz[0]: read_bytes(p), file_name=bz[1], mime="application/zip", key="bulk_dl")
+        money = st.column_config.NumberColumn(format="₹%.2f")
+        sid = data_grid("hist", HISTORY_SQL,
+                        labels={"id": "ID", "date": "Date", "customer": "Customer", "items": "Items", "grand_total": "Total", "paid_amount": "Paid", "balance": "Balance"},
+                        filter_cols=["date", "customer"], sort_cols=["id", "date", "customer", "grand_total", "balance"],
+                        decorate=with_items, column_config={"Total": money, "Paid": money, "Balance": money},
+                        select_label="Select Invoice", select_key="hist_sel")
+        if sid is not None:
+            c1, c2 = st.columns([1.5, 1])
+            inv_data = run_query("SELECT * FROM sales WHERE id=?", (sid,), fetch=True)
+            if inv_data:
+                inv = inv_data[0]
+                its = run_query("SELECT i.name, i.color, si.qty, si.price_per_unit FROM sale_items si JOIN items i ON si.item_id=i.id WHERE si.sale_id=?", (sid,), fetch=True)
+                cdet_data = run_query("SELECT * FROM customers WHERE id=?", (inv['customer_id'],), fetch=True)
+                cdet = cdet_data[0] if cdet_data else None
+
+                # GENERATE INVOICE
+                if c1.button("🖨️ Generate Invoice for Print", type="primary", key=f"gen_{sid}"):
+                    pdf_bytes = render_invoice(inv, its, cdet)
+                    b64 = base64.b64encode(pdf_bytes).decode()
+                    st.markdown(f'<iframe src="data:application/pdf;base64,{b64}" width="100%" height="800"></iframe>', unsafe_allow_html=True)
+
+                # WHATSAPP BUTTON LOGIC
+                target_phone = inv['walkin_phone'] if not cdet else cdet['phone']
+                if target_phone:
+                    cname_str = cdet['name'] if cdet else "Customer"
+                    msg = f"*🧾 INVOICE: #{inv['id']}*\n"
+                    msg += f"📅 Date: {inv['date']}\n"
+                    msg += f"👤 Customer: {cname_str}\n"
+                    msg += "------------------------------\n"
+                    msg += "*Item Details:*\n"
+                    for item in its:
+                         iname = item['name'] if 'name' in item.keys() else 'Item'
+                         clr = item['color'] if 'color' in item.keys() else ''
+                         tot_line = item['qty'] * item['price_per_unit']
+                         msg += f"• {iname} {clr} (x{item['qty']}): ₹{tot_line:,.0f}\n"
+                    msg += "------------------------------\n"
+                    msg += f"*GRAND TOTAL: ₹{inv['grand_total']:,.0f}*\n"
+                    msg += "------------------------------\n"
+                    msg += "Thank you for shopping with VSR Threads! 🙏"
+
+                    encoded_msg = quote(msg)
+                    wa_link = f"https://wa.me/91{target_phone}?text={encoded_msg}"
+                    c2.link_button(f"💬 Open WhatsApp ({target_phone})", wa_link)
+                    c2.caption("*Click to open WhatsApp web, then drag & drop the downloaded PDF.*")
+                else:
+                    c2.info("No phone number found for this invoice.")
+
+                due = inv['grand_total'] - inv['paid_amount']
+                if due > 0.01:
+                    pay_now = c2.number_input(f"Receive Payment (Bal: ₹{due:.2f})", 0.0, value=float(due), key="pay_due_amt")
+                    if c2.button("Update Payment", key="pay_due_btn"):
+                        with transaction() as c:
+                            c.execute("UPDATE sales SET paid_amount=? WHERE id=?", (inv['paid_amount']+pay_now, sid))
+                            c.execute("INSERT INTO payments (date, customer_id, sale_id, amount, note) VALUES (?,?,?,?,?)", (date.today(), inv['customer_id'], sid, pay_now, "Balance Recd"))
+                        st.success("Updated!"); st.rerun()
+                if st.button("Delete Invoice", key="del_inv"):
+                    run_query("DELETE FROM sales WHERE id=?", (sid,))  # lines + payments cascade
+                    st.warning("Deleted"); st.rerun()
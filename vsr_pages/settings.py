@@ -0,0 +1,137 @@
+""" Settings page. """
+import streamlit as st
+import sqlite3
+import pandas as pd
+import os
+import tempfile
+from datetime import date
+from vsr_assets import read_bytes
+from vsr_backup import BACKUP_DEFAULTS, COMPRESSION, SCHEDULER, compress_file, filtered_backup, list_snapshots, online_backup, read_checksum, verify_snapshot
+from vsr_db import get_conn, get_setting, init_db, rebuild_customer_balances, rebuild_daily_summary, rebuild_item_stock, run_query, transaction, update_setting
+from vsr_ui import keep_temp_file, new_temp_file
+
+BACKUP_MIME = {".db": "application/x-sqlite3", ".gz": "application/gzip", ".zst": "application/zstd"}
+# Streamlit serves a download from memory, so the whole file is read on click.
+# Past this size the backup is left on the server for copying instead.
+DOWNLOAD_MAX_MB = 1024
+
+def make_backup(build, filename, method):
+    """ Run build(path, progress) into a fresh temp file, compress it and keep it
+    in the session for download, replacing the previous backup. """
+    bar = st.progress(0.0, text="Backing up...")
+    path = new_temp_file("backup", ".db")
+    try:
+        build(path, lambda done, total: bar.progress(done / max(total, 1), text=f"Backing up... {done}/{total}"))
+        bar.progress(1.0, text="Compressing..." if COMPRESSION[method] else "Done"); path = compress_file(path, method)
+    except Exception as e:
+        if os.path.exists(path): os.remove(path)
+        bar.empty(); st.error(f"Error: {e}"); return
+    bar.empty(); keep_temp_file('db_backup', (path, filename + COMPRESSION[method]))
+
+def auto_backups():
+    """ Status and settings of the background snapshot thread. """
+    st.write("### 🕒 Automatic Backups")
+    snaps = list_snapshots(SCHEDULER.dir); last = snaps[0] if snaps else None
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Last Backup", f"{last['when']:%d-%m-%Y %H:%M}" if last else "Never")
+    m2.metric("Size", f"{last['size'] / 2**20:,.1f} MB" if last else "-")
+    m3.metric("Stored", f"{sum(s['tier'] == 'hourly' for s in snaps)} hourly · {sum(s['tier'] == 'daily' for s in snaps)} daily")
+    stt = SCHEDULER.status
+    if stt['error']: st.error(f"{stt['message']}: {stt['error']}")
+    elif stt['checked']: st.caption(f"Checked {stt['checked']:%H:%M}: {stt['message']}")
+    if last: st.caption(f"{os.path.basename(last['path'])} · SHA-256 {(read_checksum(last['path']) or '?')[:16]}… · folder {SCHEDULER.dir}")
+    a1, a2, a3 = st.columns(3)
+    cur = {k: int(float(get_setting(k) or v)) for k, v in BACKUP_DEFAULTS.items()}
+    every = a1.number_input("Every (minutes, 0 = off)", 0, 24 * 60, cur['backup_every_min'], key="ab_every")
+    keep_h = a2.number_input("Keep hourly", 1, 500, cur['backup_keep_hourly'], key="ab_keep_h")
+    keep_d = a3.number_input("Keep daily", 1, 500, cur['backup_keep_daily'], key="ab_keep_d")
+    b1, b2, b3 = st.columns(3)
+    if b1.button("Save Schedule", key="ab_save"):
+        update_setting("backup_every_min", every); update_setting("backup_keep_hourly", keep_h); update_setting("backup_keep_daily", keep_d)
+        st.success("Saved")
+    if b2.button("Back Up Now", key="ab_now"): SCHEDULER.run_now(); st.info("Backup started in the background.")
+    if last and b3.button("Verify Latest", key="ab_verify"):
+        if verify_snapshot(last['path']): st.success("Checksum OK")
+        else: st.error("Checksum mismatch or missing")
+
+def render():
+    with st.container(border=True):
+        st.subheader("Config")
+        gst = st.text_input("GST", get_setting("gst_number"), key="set_gst")
+        # --- FIXED: Removed min_value constraint ---
+        c = st.number_input("CGST %", value=float(get_setting("cgst_percent")), step=0.1, key="set_cgst")
+        s = st.number_input("SGST %", value=float(get_setting("sgst_percent")), step=0.1, key="set_sgst")
+        ba = st.text_area("Address", get_setting("business_address"), key="set_addr")
+        # --- ADDED: Business Contact Field ---
+        bc = st.text_input("Business Contact", get_setting("business_contact"), key="set_contact")
+
+        if st.button("Save", key="set_save"): 
+            update_setting("gst_number", gst)
+            update_setting("cgst_percent", c)
+            update_setting("sgst_percent", s)
+            update_setting("business_address", ba)
+            update_setting("business_contact", bc)
+            st.success("Saved")
+
+    with st.expander("Master Item List"):
+        c1, c2 = st.columns(2)
+        new_m = c1.text_input("Add New Item Name", key="m_new")
+        if c1.button("Add Master Name", key="m_add") and new_m:
+            try: run_query("INSERT INTO master_names (name) VALUES (?)", (new_m,)); st.success("Added")
+            except: st.error("Exists")
+        m_list = run_query("SELECT name FROM master_names", fetch=True)
+        if m_list:
+            df_m = pd.DataFrame([m['name'] for m in m_list], columns=["Defined Names"]); st.dataframe(df_m, hide_index=True)
+            d_name = c2.selectbox("Delete Name", [m['name'] for m in m_list], key="m_del_sel")
+            if c2.button("Delete Selected", key="m_del_btn"): run_query("DELETE FROM master_names WHERE name=?", (d_name,)); st.rerun()
+    with st.expander("Expense Categories"):
+        curr = get_setting("expense_categories")
+        new = st.text_area("Categories", curr, key="set_cats")
+        if st.button("Update", key="set_upd_cat"): update_setting("expense_categories", new); st.success("Saved")
+    with st.expander("Maintenance"):
+        st.caption("Stock and customer balances are kept up to date automatically. Rebuild only after editing sales, payments or stock rows by hand.")
+        m1, m2 = st.columns(2)
+        if m1.button("Rebuild Stock Balances", key="mnt_stock"):
+            # BEGIN IMMEDIATE: no sale can land between the DELETE and the re-INSERT
+            with transaction() as c: rebuild_item_stock(c)
+            st.success("Stock balances rebuilt")
+        if m2.button("Rebuild Customer Balances", key="mnt_cust"):
+            with transaction() as c: rebuild_customer_balances(c)
+            st.success("Customer balances rebuilt")
+        r1, r2, r3 = st.columns([1, 1, 1])
+        rd1 = r1.date_input("Summary From", None, key="mnt_ds_d1"); rd2 = r2.date_input("Summary To", None, key="mnt_ds_d2")
+        if r3.button("Rebuild Daily Summary", key="mnt_ds"):
+            # Leave both dates empty to rebuild every day
+            with transaction() as c: rebuild_daily_summary(c, rd1, rd2)
+            st.success("Daily summary rebuilt")
+    with st.expander("Backup & Export Data"):
+        st.write("### 📅 Date-Filtered Database Backup")
+        c1, c2 = st.columns(2)
+        d1 = c1.date_input("Start Date", key="bk_d1"); d2 = c2.date_input("End Date", key="bk_d2")
+        comp = st.selectbox("Compression", list(COMPRESSION), key="bk_comp")
+        b1, b2 = st.columns(2)
+        # Both read a snapshot of the live DB; sales keep saving meanwhile
+        if b1.button("Generate & Download Database", key="db_gen_btn"):
+            make_backup(lambda p, prog: filtered_backup(p, d1, d2, prog), f"backup_{d1}_{d2}.db", comp)
+        if b2.button("Full Backup", key="db_full_btn"):
+            make_backup(online_backup, f"backup_full_{date.today()}.db", comp)
+        bk = st.session_state.get('db_backup')
+        if bk and os.path.exists(bk[0]):
+            mb = os.path.getsize(bk[0]) / 2**20; st.caption(f"{bk[1]} · {mb:,.1f} MB")
+            if mb > DOWNLOAD_MAX_MB: st.warning(f"Too large to download through the browser. Copy it from the server: {bk[0]}")
+            else: st.download_button(f"⬇️ Download {bk[1]}", data=lambda p=bk[0]: read_bytes(p), file_name=bk[1], mime=BACKUP_MIME[os.path.splitext(bk[1])[1]], key="db_dl")
+        st.divider()
+        auto_backups()
+        st.divider()
+        up = st.file_uploader("Restore Database", type="db", key="db_up")
+        if up and st.button("Restore System", key="db_rst"):
+            # Copy through the backup API so the live WAL and open connections stay consistent
+            fd, tmp_path = tempfile.mkstemp(suffix=".db")
+            try:
+                with os.fdopen(fd, "wb") as f: f.write(up.getbuffer())
+                src = sqlite3.connect(tmp_path); src.backup(get_conn()); src.close()
+            finally:
+                try: os.remove(tmp_path)
+                except: pass
+            init_db(force=True)  # restored file may be on an older schema
+            st.success("Restored!"); st.rerun()
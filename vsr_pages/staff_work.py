@@ -0,0 +1,96 @@
+""" Staff Work page. """
+import streamlit as st
+import pandas as pd
+from datetime import datetime, date
+from vsr_db import run_query, transaction
+from vsr_ui import data_grid
+
+def render():
+    if 'staff_cart' not in st.session_state: st.session_state.staff_cart = []
+    with st.container(border=True):
+        st.write("#### Add Staff Work")
+        c1, c2, c3 = st.columns(3)
+        d = c1.date_input("Date", date.today(), key="sw_date"); nm = c2.text_input("Staff Name", key="sw_name"); kg_given = c3.number_input("KG Given", 0.0, key="sw_kg")
+        st.markdown("---")
+        ci, cg, cq, cr, ca = st.columns([2,1,1,1,1])
+        m_names = run_query("SELECT name FROM master_names", fetch=True)
+        name_list = [m['name'] for m in m_names] if m_names else []
+        if name_list:
+            sl = ci.selectbox("Item Name", name_list, key="sw_item"); clr = cg.text_input("Color", key="sw_clr_txt"); grams = cq.number_input("Gm/Pkt", 1.0, value=40.0, key="sw_gm"); qty = cr.number_input("Pkts", 0, key="sw_qty"); rate = ca.number_input("Rate", 0.0, key="sw_rate")
+            if st.button("Add Item to List", key="sw_add"): 
+                exist = run_query("SELECT id FROM items WHERE name=? AND color=?", (sl, clr), fetch=True)
+                tid = exist[0]['id'] if exist else 0
+                st.session_state.staff_cart.append({"id": tid, "name": f"{sl} ({clr})", "grams": grams, "qty": qty, "rate": rate, "total": qty*rate, "weight": (qty*grams)/1000})
+        else: st.warning("Add Item Names in Settings first.")
+        if st.session_state.staff_cart:
+            df = pd.DataFrame(st.session_state.staff_cart)
+            st.dataframe(df, use_container_width=True, column_config={"rate": st.column_config.NumberColumn(format="₹%.2f"), "total": st.column_config.NumberColumn(format="₹%.2f")})
+            tsal = df['total'].sum(); tkg = df['weight'].sum(); tpkts = df['qty'].sum()
+            avg_grams = df['grams'].mean(); exp_pkts = int((kg_given*1000)/avg_grams) if avg_grams > 0 else 0
+            m1, m2, m3, m4 = st.columns(4)
+            # UPDATED METRICS (Output Weight instead of Expected Packets)
+            total_weight_produced = df['weight'].sum()
+            balance = kg_given - total_weight_produced
+
+            m1.metric("Salary", f"₹{tsal}")
+            m2.metric("Total Pkts Produced", tpkts)
+            m3.metric("Output Weight", f"{total_weight_produced:.3f} kg")
+            m4.metric("Balance Material", f"{balance:.3f} kg", delta_color="inverse" if balance > 0 else "normal")
+
+            notes_sw = st.text_input("Notes (Optional)", key="sw_notes")
+            if st.button("✅ Save Entry", type="primary", key="sw_confirm"):
+                try:
+                    with transaction() as c:
+                        c.execute("INSERT INTO staff_work (date, staff_name, kg_provided, total_salary, notes) VALUES (?,?,?,?,?)", (d, nm, kg_given, tsal, notes_sw))
+                        wid = c.lastrowid
+                        c.executemany("INSERT INTO staff_work_items (work_id, item_id, item_name, grams, qty_produced, rate, amount) VALUES (?,?,?,?,?,?,?)",
+                                      [(wid, l['id'], l['name'], l['grams'], l['qty'], l['rate'], l['total']) for l in st.session_state.staff_cart])
+                        c.execute("INSERT INTO expenses (date, category, description, amount, staff_entry_id) VALUES (?,?,?,?,?)", (d, "Salary", f"Salary: {nm}", tsal, wid))
+                except Exception as e: st.error(f"Entry not saved: {e}")
+                else: st.session_state.staff_cart = []; st.success("Saved!"); st.rerun()
+            if st.button("Clear", key="sw_clr_btn"): st.session_state.staff_cart = []; st.rerun()
+    st.subheader("History")
+    def with_breakdown(rows):
+        ph = ",".join("?" * len(rows))
+        agg = {r['work_id']: r for r in run_query(f"""SELECT swi.work_id, COALESCE(SUM(swi.qty_produced), 0) as total_pkts,
+               COALESCE(SUM(swi.qty_produced * swi.grams)/1000, 0) as weight_ret,
+               GROUP_CONCAT(COALESCE(swi.item_name, i.name, 'Generic') || ' (' || swi.qty_produced || ')', ', ') as breakdown
+               FROM staff_work_items swi LEFT JOIN items i ON swi.item_id = i.id
+               WHERE swi.work_id IN ({ph}) GROUP BY swi.work_id""", tuple(r['id'] for r in rows), fetch=True)}
+        table_data = []
+        for d in rows:
+            a = agg.get(d['id'])
+            d['total_pkts'] = a['total_pkts'] if a else 0
+            d['weight_ret'] = a['weight_ret'] if a else 0
+            d['Produced Details'] = a['breakdown'] if a and a['breakdown'] else "No Items"
+            d['Weight Analysis'] = f"Given: {d['kg_provided']}kg | Ret: {d['weight_ret']:.2f}kg"
+            table_data.append(d)
+        return table_data
+    did = data_grid("sw", "SELECT id, date, staff_name, kg_provided, total_salary, notes FROM staff_work",
+                    filter_cols=["date", "staff_name"], sort_cols=["date", "id", "staff_name", "total_salary"], sort_col="date",
+                    decorate=with_breakdown, column_config={"total_salary": st.column_config.NumberColumn(format="₹%.2f"), "kg_provided": st.column_config.NumberColumn(format="%.2f kg")},
+                    select_key="sw_del_sel")
+    if did is not None:
+        with st.expander("View / Edit / Delete Entry"):
+
+            # RETRIEVE BUTTON ADDED
+            if st.button("⬇️ Retrieve Details", key="sw_retr_btn"):
+                 sw_res = run_query("SELECT * FROM staff_work WHERE id=?", (did,), fetch=True)
+                 if sw_res:
+                    st.session_state.edit_sw_data = sw_res[0]
+                 else:
+                    st.error("Entry not found.")
+
+            if 'edit_sw_data' in st.session_state and st.session_state.edit_sw_data and st.session_state.edit_sw_data['id'] == did:
+                dets = run_query("SELECT COALESCE(swi.item_name, i.name, 'Generic') as name, swi.grams, swi.qty_produced, swi.rate, swi.amount FROM staff_work_items swi LEFT JOIN items i ON swi.item_id=i.id WHERE swi.work_id=?", (did,), fetch=True)
+                st.write("**Batch Details:**")
+                st.table(pd.DataFrame([dict(r) for r in dets]))
+                w_dat = st.session_state.edit_sw_data
+                ud = st.date_input("Edit Date", datetime.strptime(w_dat['date'], '%Y-%m-%d'), key="sw_ed_d")
+                unm = st.text_input("Edit Name", w_dat['staff_name'], key="sw_ed_nm")
+                ukg = st.number_input("Edit KG Provided", w_dat['kg_provided'], key="sw_ed_kg")
+                c1, c2 = st.columns(2)
+                if c1.button("Update Entry", key="sw_upd"):
+                    run_query("UPDATE staff_work SET date=?, staff_name=?, kg_provided=? WHERE id=?", (ud, unm, ukg, did)); st.success("Updated"); del st.session_state.edit_sw_data; st.rerun()
+                if c2.button("Delete Entry", key="sw_del_btn"):
+                    run_query("DELETE FROM staff_work WHERE id=?", (did,)); st.warning("Deleted"); del st.session_state.edit_sw_data; st.rerun()  # items + salary expense cascade
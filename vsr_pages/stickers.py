@@ -0,0 +1,75 @@
+""" Print Stickers page. """
+import streamlit as st
+import pandas as pd
+from datetime import date
+import base64
+import time
+from vsr_assets import ASSETS
+from vsr_db import run_query
+from vsr_ui import default_thickness, render_labels
+
+def render():
+    st.markdown("### 🖨️ Print Stickers (A4 Landscape)")
+
+    st_title = st.text_input("Sticker Title", value="நூல் கண்டு")
+    st_cell = st.text_input("Cell Number", value="7418570821")
+
+    # Priority: Image (title.png) > Text
+    if ASSETS.mtime("title.png") is not None:
+        st.success("✅ Image title found (title.png). Using image instead of text.")
+    elif ASSETS.mtime("tamil.ttf") is None:
+        st.warning("⚠️ For Tamil text, please add 'tamil.ttf' or 'Nirmala.ttf' to the app folder. Currently using system defaults.")
+
+    c1, c2 = st.columns(2)
+    t_val = c1.number_input("Thread Thickness Value", 1, value=6)
+    n_sheets = c2.number_input("Number of Sheets (9 stickers/sheet)", 1, value=1)
+    renderer = st.radio("Renderer", ["Vector (small, fast)", "Raster (classic)"], horizontal=True, key="stk_renderer")
+
+    if st.button("Generate Sticker PDF", type="primary"):
+        from vsr_render import generate_pdf_from_images, generate_vector_sticker_pdf  # Pillow/fpdf load on first use
+        make_pdf = generate_vector_sticker_pdf if renderer.startswith("Vector") else generate_pdf_from_images
+        pdf_bytes = make_pdf(t_val, n_sheets, st_title, st_cell)
+
+        # 1. Base64 Preview
+        base64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
+        pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height="900" type="application/pdf"></iframe>'
+
+        st.markdown("### 🖨️ Sticker Preview")
+        st.markdown(pdf_display, unsafe_allow_html=True)
+
+        # 2. Download Button
+        st.download_button(
+            label="⬇️ Download PDF",
+            data=pdf_bytes,
+            file_name="sticker.pdf",
+            mime="application/pdf"
+        )
+
+    st.info("💡 Pro Tip: For perfect Tamil text, you can upload an image of the text named 'title.png' to the app folder.")
+
+    st.markdown("---")
+    with st.expander("🏷️ Item Labels (Batch)"):
+        src = st.radio("Labels for", ["Stock received on", "Pick items"], horizontal=True, key="lbl_src")
+        if src == "Stock received on":
+            ld = st.date_input("Date", date.today(), key="lbl_date")
+            rows = run_query("""SELECT i.id, i.name, i.color, SUM(sl.qty_added) AS labels FROM stock_logs sl JOIN items i ON i.id = sl.item_id
+                                WHERE sl.date = ? GROUP BY i.id HAVING labels > 0 ORDER BY i.name""", (str(ld),), fetch=True)
+        else:
+            ld = ""; rows = run_query("SELECT id, name, color, 0 AS labels FROM items ORDER BY name", fetch=True)
+        if not rows: st.info("No stock received on this date.")
+        else:
+            ldf = pd.DataFrame([dict(r) for r in rows]); ldf.insert(3, 'thickness', [default_thickness(n) for n in ldf['name']])
+            ed = st.data_editor(ldf, hide_index=True, use_container_width=True, disabled=["id", "name", "color"], key=f"lbl_ed_{src}_{ld}",
+                                column_config={"id": "ID", "name": "Item", "color": "Color", "thickness": st.column_config.TextColumn("Thickness"),
+                                               "labels": st.column_config.NumberColumn("Labels", min_value=0, step=1)})
+            runs = [((int(r.id), r.name or "", r.color or "", str(r.thickness or "")), int(r.labels)) for r in ed.itertuples() if pd.notna(r.labels) and r.labels > 0]
+            total = sum(n for _, n in runs)
+            st.caption(f"{total} labels · {len(runs)} items · {-(-total // 9)} sheets")
+            if st.button("Generate Label PDF", type="primary", key="lbl_go", disabled=not runs):
+                from vsr_render import generate_label_pdf
+                t0 = time.perf_counter()
+                try: pdf_bytes = generate_label_pdf(render_labels([l for l, _ in runs]), runs)
+                except Exception as e: st.error(f"Labels not generated: {e}")
+                else:
+                    st.success(f"✅ {total} labels in {time.perf_counter() - t0:.1f}s")
+                    st.download_button("⬇️ Download Labels PDF", data=pdf_bytes, file_name=f"labels_{ld or date.today()}.pdf", mime="application/pdf", key="lbl_dl")
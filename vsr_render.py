@@ -0,0 +1,404 @@
+""" Invoice, P&L and sticker rendering for VSR Threads.
+
+Kept free of Streamlit so worker processes can import it for bulk exports.
+Workers are forked from the threaded server, so the batch entry points take
+every asset they need as arguments and never touch ASSETS (or its lock). """
+import os
+import zlib
+import qrcode
+from datetime import date
+from functools import lru_cache
+from fpdf import FPDF, set_global
+from PIL import Image, ImageDraw, ImageFont
+from vsr_assets import resource_path, ASSETS, open_rgba
+
+# add_font(uni=True) would otherwise write a metrics .pkl next to each font file
+set_global("FPDF_CACHE_MODE", 1)
+
+def pdf_to_bytes(pdf):
+    """ Render an FPDF document in memory (no temp file). """
+    out = pdf.output(dest='S')
+    return out.encode('latin-1') if isinstance(out, str) else bytes(out)
+
+@lru_cache(maxsize=16)
+def load_font(path, size):
+    """ TrueType font by (path, size), opened once per process. """
+    try: return ImageFont.truetype(path, size) if path else ImageFont.load_default(size)
+    except Exception: return ImageFont.load_default(size)
+
+def pil_image_info(img):
+    """ FPDF image resource for a PIL image, built in memory (FPDF 1.7 only
+    reads images from files). Register it with pdf.images[name] = dict(info, i=n). """
+    img = img.convert("RGB")
+    return {'w': img.size[0], 'h': img.size[1], 'cs': 'DeviceRGB', 'bpc': 8, 'f': 'FlateDecode', 'data': zlib.compress(img.tobytes())}
+
+def flat_image_info(path, bg=(255, 255, 255)):
+    """ Image resource for an asset at native size, flattened onto bg (the PDF
+    scales it; skips FPDF's pure-Python PNG decoder, which dominated render time). """
+    im = open_rgba(path); flat = Image.new("RGB", im.size, bg); flat.paste(im, (0, 0), mask=im)
+    return pil_image_info(flat)
+
+def invoice_logo():
+    """ Invoice logo image resource; {} when logo.png is missing. """
+    return ASSETS.get("logo.png", "pdf", flat_image_info) or {}
+
+def create_pdf(sale, items, customer, gst, addr, phone, logo=None):
+    sale = dict(sale)
+    pdf = FPDF(); pdf.add_page()
+    if logo is None: logo = invoice_logo()
+    has_logo = bool(logo)
+    if has_logo:
+        pdf.images['logo'] = dict(logo, i=1)
+        pdf.image('logo', x=60, y=100, w=90); pdf.image('logo', x=10, y=8, w=25); pdf.set_xy(10, 35)
+    else: pdf.set_y(10)
+
+    pdf.set_font('Arial', 'B', 20); pdf.set_text_color(30, 58, 138)
+    if has_logo: pdf.text(38, 18, 'VSR Threads')
+    else: pdf.cell(0, 10, 'VSR Threads', 0, 1)
+
+    pdf.set_font('Arial', '', 9); pdf.set_text_color(100, 100, 100)
+    if has_logo: pdf.set_xy(38, 20)
+    pdf.cell(0, 5, addr, 0, 1)
+    if has_logo: pdf.set_x(38)
+    pdf.cell(0, 5, f"Phone: {phone}", 0, 1)
+    if gst: 
+        if has_logo: pdf.set_x(38)
+        pdf.cell(0, 5, f"GSTIN: {gst}", 0, 1)
+    
+    pdf.ln(10); 
+    if has_logo: pdf.ln(5)
+    
+    pdf.set_text_color(0); pdf.set_font('Arial', 'B', 11)
+    pdf.cell(100, 6, "Bill To:", 0, 0); pdf.cell(0, 6, "Invoice Details:", 0, 1)
+    pdf.set_font('Arial', '', 10)
+    cname = customer['name'] if customer else "Walk-in"
+    cphone = customer['phone'] if customer else ""
+    if not customer and sale.get('walkin_phone'): cphone = sale['walkin_phone']
+
+    pdf.cell(100, 5, cname, 0, 0); pdf.cell(0, 5, f"Invoice #: {sale['id']}", 0, 1)
+    pdf.cell(100, 5, cphone, 0, 0); pdf.cell(0, 5, f"Date: {sale['date']}", 0, 1)
+    pdf.ln(10); pdf.set_fill_color(240, 240, 240); pdf.set_font('Arial', 'B', 10)
+    
+    pdf.cell(80, 8, "Item", 1, 0, 'L', True); pdf.cell(30, 8, "Color", 1, 0, 'C', True)
+    pdf.cell(20, 8, "Qty", 1, 0, 'C', True); pdf.cell(30, 8, "Price (Inc)", 1, 0, 'R', True); pdf.cell(30, 8, "Total", 1, 1, 'R', True)
+    pdf.set_font('Arial', '', 10)
+    for i in items:
+        tot = i['qty']*i['price_per_unit']
+        try: i_name = str(i['name']).encode('latin-1', 'ignore').decode('latin-1')
+        except: i_name = "Item"
+        try: i_color = str(i['color']).encode('latin-1', 'ignore').decode('latin-1')
+        except: i_color = "-"
+        
+        pdf.cell(80, 8, i_name, 1); pdf.cell(30, 8, i_color, 1, 0, 'C')
+        pdf.cell(20, 8, str(i['qty']), 1, 0, 'C'); pdf.cell(30, 8, f"{i['price_per_unit']:.2f}", 1, 0, 'R')
+        pdf.cell(30, 8, f"{tot:.2f}", 1, 1, 'R')
+    pdf.ln(5)
+    def tr(lbl, val, bold=False):
+        pdf.set_font('Arial', 'B' if bold else '', 10)
+        pdf.cell(130, 7, "", 0); pdf.cell(30, 7, lbl, 0, 0, 'R'); pdf.cell(30, 7, f"{val:.2f}", 1, 1, 'R')
+    
+    tr("Taxable Amt:", sale['sub_total'])
+    if sale['cgst_amount'] > 0: tr(f"CGST:", sale['cgst_amount']); tr(f"SGST:", sale['sgst_amount'])
+    tr("Grand Total:", sale['grand_total'], True); tr("Paid:", sale['paid_amount'])
+    due = sale['grand_total'] - sale['paid_amount']
+    if due > 0.01: tr("Balance Due:", due, True)
+    
+    return pdf_to_bytes(pdf)
+
+def _render_one(job, logo):
+    sale, items, customer, gst, addr, phone = job
+    return sale['id'], create_pdf(sale, items, customer, gst, addr, phone, logo)
+
+def render_invoice_batch(jobs, logo):
+    """ Worker entry point: render a chunk of invoices with `logo` (from
+    invoice_logo() in the parent), returning [(sale_id, pdf bytes)]. """
+    return [_render_one(j, logo) for j in jobs]
+
+def create_pnl_pdf(pnl):
+    d1 = pnl.date_from or date(2020,1,1); d2 = pnl.date_to or date.today()
+    rev, cogs, net = pnl.revenue, pnl.cogs, pnl.net_profit
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, "Profit & Loss Statement", 0, 1, 'C')
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(0, 10, f"Period: {d1.strftime('%d-%m-%Y')} to {d2.strftime('%d-%m-%Y')}", 0, 1, 'C')
+    pdf.ln(10)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(100, 10, "Description", 1); pdf.cell(50, 10, "Amount", 1, 1, 'R')
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(100, 10, "Total Sales (Revenue)", 1); pdf.cell(50, 10, f"{rev:,.2f}", 1, 1, 'R')
+    pdf.cell(100, 10, "Cost of Goods Sold (COGS)", 1); pdf.cell(50, 10, f"-{cogs:,.2f}", 1, 1, 'R')
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(100, 10, "Gross Profit", 1); pdf.cell(50, 10, f"{rev-cogs:,.2f}", 1, 1, 'R')
+    pdf.ln(5)
+    pdf.cell(0, 10, "Expenses Breakdown:", 0, 1)
+    pdf.set_font('Arial', '', 11)
+    for e in pnl.expenses:
+        pdf.cell(100, 8, str(e['category']), 1); pdf.cell(50, 8, f"{e['total']:,.2f}", 1, 1, 'R')
+    tot_exp = pnl.total_expenses
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(100, 10, "Total Expenses", 1); pdf.cell(50, 10, f"-{tot_exp:,.2f}", 1, 1, 'R')
+    pdf.ln(5)
+    pdf.set_fill_color(220, 255, 220) 
+    pdf.cell(100, 12, "NET PROFIT", 1, 0, 'L', True); pdf.cell(50, 12, f"{net:,.2f}", 1, 1, 'R', True)
+    return pdf_to_bytes(pdf)
+
+# --- STICKERS ---
+def title_font_path():
+    """ First available font for the sticker title (Tamil-capable first). """
+    # Use resource_path for tamil.ttf
+    possible = [resource_path("tamil.ttf"), resource_path("Nirmala.ttf"), "C:/Windows/Fonts/Nirmala.ttf", "arial.ttf"]
+    return next((p for p in possible if os.path.exists(p)), None)
+
+def sticker_font_path():
+    """ Font for the sticker number and cell text: Arial if available, else the title font. """
+    possible = [resource_path("arial.ttf"), "C:/Windows/Fonts/arial.ttf"]
+    return next((p for p in possible if os.path.exists(p)), None) or title_font_path()
+
+def create_sticker_image(thickness_val, title_text, cell_number):
+    width = 1086; height = 744
+    img = Image.new('RGB', (width, height), color=(255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    
+    # 1. BORDER
+    border_color = (30, 58, 138)
+    draw.rectangle([10, 10, width-10, height-10], outline=border_color, width=15)
+    
+    # 2. HEADER BG
+    header_color = (239, 246, 255)
+    draw.rectangle([25, 25, width-25, 180], fill=header_color)
+    
+    # 3. TITLE (title.png from the asset registry, else text)
+    t_img = ASSETS.get("title.png", "rgba", open_rgba)
+    title_drawn = False
+    
+    if t_img is not None:
+        try:
+            max_h = 120
+            h_ratio = (max_h / float(t_img.size[1]))
+            w_size = int((float(t_img.size[0]) * float(h_ratio)))
+            t_img = t_img.resize((w_size, max_h), Image.Resampling.LANCZOS)
+            tx = int((width - w_size) / 2)
+            ty = int(25 + (155 - max_h) / 2)
+            bg = Image.new('RGBA', img.size, (255, 255, 255, 0))
+            bg.paste(t_img, (tx, ty), mask=t_img)
+            img.paste(bg, (0,0), mask=bg)
+            title_drawn = True
+        except: pass
+
+    if not title_drawn:
+        # Fallback to Text
+        try:
+            title_font = load_font(title_font_path(), 80)
+        except: title_font = ImageFont.load_default()
+        
+        try:
+            text_bbox = draw.textbbox((0, 0), title_text, font=title_font)
+            text_w = text_bbox[2] - text_bbox[0]
+            text_h = text_bbox[3] - text_bbox[1]
+            text_x = (width - text_w) / 2
+            text_y = int(25 + (155 - text_h) / 2) - 15
+            draw.text((text_x, text_y), title_text, font=title_font, fill=(0,0,0))
+        except:
+            draw.text((100, 75), "Nool Kandu", fill=(0,0,0))
+
+    # 4. LOGO
+    logo = ASSETS.get("logo.png", "rgba", open_rgba)
+    if logo is not None:
+        try:
+            header_end_y = 205; footer_start_y = height - 120 
+            available_h = footer_start_y - header_end_y
+            target_h = int(available_h * 0.8) 
+            wpercent = (target_h / float(logo.size[1]))
+            target_w = int((float(logo.size[0]) * float(wpercent)))
+            if target_w > 900:
+                target_w = 900
+                wpercent = (target_w / float(logo.size[0]))
+                target_h = int((float(logo.size[1]) * float(wpercent)))
+            logo = logo.resize((target_w, target_h), Image.Resampling.LANCZOS)
+            lx = int((width - target_w) / 2)
+            ly = int(header_end_y + (available_h - target_h) / 2)
+            bg = Image.new('RGBA', img.size, (255, 255, 255, 0))
+            bg.paste(logo, (lx, ly), mask=logo)
+            img.paste(bg, (0,0), mask=bg)
+        except: pass
+
+    num_font = load_font(sticker_font_path(), 450)
+    
+    num_text = str(thickness_val)
+    try:
+        num_bbox = draw.textbbox((0, 0), num_text, font=num_font)
+        nw = num_bbox[2] - num_bbox[0]
+        draw.text((width - nw - 50, height - 520), num_text, font=num_font, fill=(220, 38, 38))
+    except:
+        draw.text((width - 300, height - 400), num_text, fill=(220, 38, 38))
+
+    cell_font = load_font(sticker_font_path(), 80)
+    
+    cell_display_text = f"Cell: {cell_number}"
+    draw.text((50, height - 120), cell_display_text, font=cell_font, fill=(0,0,0))
+    
+    return img
+
+STICKER_ASSETS = ("title.png", "logo.png", "tamil.ttf", "Nirmala.ttf")
+
+def sticker_master(thickness_val, title_text, cell_number):
+    """ Rendered sticker as an FPDF image resource, cached by its inputs and the
+    asset mtimes so edits to title.png/logo.png/fonts are picked up. """
+    return _sticker_master(str(thickness_val), title_text, str(cell_number), tuple(ASSETS.mtime(a) for a in STICKER_ASSETS))
+
+@lru_cache(maxsize=32)
+def _sticker_master(thickness_val, title_text, cell_number, _mtimes):
+    return pil_image_info(create_sticker_image(thickness_val, title_text, cell_number))
+
+def generate_pdf_from_images(thickness_val, num_sheets, title_text, cell_text):
+    pdf = FPDF('L', 'mm', 'A4')
+    pdf.set_auto_page_break(False)
+    pdf.images['sticker'] = dict(sticker_master(thickness_val, title_text, cell_text), i=1)
+    margin_x = 10; margin_y = 10
+    sticker_w = 92; sticker_h = 63
+    
+    for _ in range(num_sheets):
+        pdf.add_page()
+        for i in range(3): 
+            for j in range(3): 
+                x = margin_x + (j * sticker_w)
+                y = margin_y + (i * sticker_h)
+                pdf.image('sticker', x=x, y=y, w=sticker_w, h=sticker_h)
+    
+    return pdf_to_bytes(pdf)
+
+# --- VECTOR STICKERS ---
+# Same layout as create_sticker_image, but the border, header band, number and
+# cell text are PDF drawing ops; only the title and logo are raster images,
+# embedded once per document. Coordinates below are in sticker pixels (1086x744).
+STICKER_PX = (1086, 744)
+
+def px_to_pt(px, mm_per_px):
+    return px * mm_per_px * 72 / 25.4
+
+@lru_cache(maxsize=16)
+def _title_text_image(title_text, _mtimes):
+    """ Title text rasterised once on the header colour (FPDF 1.7 cannot shape Tamil). """
+    font = load_font(title_font_path(), 80)
+    box = ImageDraw.Draw(Image.new('RGB', (1, 1))).textbbox((0, 0), title_text, font=font)
+    img = Image.new('RGB', (max(1, box[2] - box[0]), max(1, box[3] - box[1])), (239, 246, 255))
+    ImageDraw.Draw(img).text((-box[0], -box[1]), title_text, font=font, fill=(0, 0, 0))
+    return pil_image_info(img)
+
+def sticker_layout(title_text):
+    """ Title and logo image resources placed [(resource, x, y, w, h)] in
+    sticker pixels, using the same maths as create_sticker_image. """
+    width, height = STICKER_PX; out = []
+    src = ASSETS.get("title.png", "sticker-header", lambda p: flat_image_info(p, (239, 246, 255)))
+    if src is not None: iw, ih, th = src['w'], src['h'], 120
+    else:
+        src = _title_text_image(title_text, tuple(ASSETS.mtime(a) for a in STICKER_ASSETS)); iw, ih = src['w'], src['h']; th = ih
+    tw = iw * th / ih
+    if tw > width - 60: tw, th = width - 60, th * (width - 60) / tw
+    out.append((src, (width - tw) / 2, 25 + (155 - th) / 2, tw, th))
+
+    logo = ASSETS.get("logo.png", "pdf", flat_image_info)
+    if logo is not None:
+        iw, ih = logo['w'], logo['h']
+        header_end_y = 205; available_h = (height - 120) - header_end_y
+        lh = int(available_h * 0.8); lw = int(iw * lh / ih)
+        if lw > 900: lw = 900; lh = int(ih * 900 / iw)
+        out.append((logo, (width - lw) / 2, header_end_y + (available_h - lh) / 2, lw, lh))
+    return out
+
+def needs_shaping(text):
+    """ True if text has Indic characters (U+0900-U+0DFF), whose glyphs FPDF would draw unshaped. """
+    return any("\u0900" <= ch <= "\u0dff" for ch in text)
+
+def generate_vector_sticker_pdf(thickness_val, num_sheets, title_text, cell_text):
+    """ Vector version of generate_pdf_from_images: same 3x3 A4 grid, a fraction of the size.
+    Text is set in the raster sticker's TTF, embedded (subset) as a Unicode font;
+    FPDF 1.7 cannot shape Indic scripts, so such text goes to the raster renderer. """
+    font = sticker_font_path()
+    if font is None or needs_shaping(f"{thickness_val}{cell_text}"):
+        return generate_pdf_from_images(thickness_val, num_sheets, title_text, cell_text)
+    pdf = FPDF('L', 'mm', 'A4')
+    pdf.set_auto_page_break(False)
+    pdf.add_font('sticker', '', font, uni=True)
+    margin_x = 10; margin_y = 10
+    sticker_w = 92; sticker_h = 63
+    width, height = STICKER_PX; k = sticker_w / width
+
+    images = []
+    for n, (info, x, y, w, h) in enumerate(sticker_layout(title_text), 1):
+        pdf.images[f'asset{n}'] = dict(info, i=n)
+        images.append((f'asset{n}', x * k, y * k, w * k, h * k))
+    num_text = str(thickness_val); cell_display_text = f"Cell: {cell_text}"
+    num_pt = px_to_pt(450, k); cell_pt = px_to_pt(80, k)
+
+    for _ in range(num_sheets):
+        pdf.add_page()
+        for i in range(3):
+            for j in range(3):
+                x0 = margin_x + (j * sticker_w); y0 = margin_y + (i * sticker_h)
+                pdf.set_draw_color(30, 58, 138); pdf.set_line_width(15 * k)
+                pdf.rect(x0 + 17.5 * k, y0 + 17.5 * k, (width - 35) * k, (height - 35) * k)
+                pdf.set_fill_color(239, 246, 255); pdf.rect(x0 + 25 * k, y0 + 25 * k, (width - 50) * k, 155 * k, 'F')
+                for name, x, y, w, h in images: pdf.image(name, x=x0 + x, y=y0 + y, w=w, h=h)
+                pdf.set_font('sticker', '', num_pt); pdf.set_text_color(220, 38, 38)
+                pdf.text(x0 + (width - 50) * k - pdf.get_string_width(num_text), y0 + (height - 110) * k, num_text)
+                pdf.set_font('sticker', '', cell_pt); pdf.set_text_color(0, 0, 0)
+                pdf.text(x0 + 50 * k, y0 + (height - 70) * k, cell_display_text)
+
+    return pdf_to_bytes(pdf)
+
+# --- ITEM LABELS ---
+LABEL_SIZE = (1086, 744)
+
+def fit_font(draw, text, path, size, max_w, min_size=36):
+    """ Largest font of `path` (size stepping down) whose rendering of text fits max_w. """
+    while size > min_size and draw.textlength(text, font=load_font(path, size)) > max_w: size -= 6
+    return load_font(path, size)
+
+def qr_image(data, side):
+    qr = qrcode.QRCode(border=1); qr.add_data(data); qr.make(fit=True)
+    qr.box_size = max(1, side // (qr.modules_count + 2))
+    return qr.make_image(fill_color="black", back_color="white").get_image().convert("RGB")
+
+def create_item_label(item_id, name, color, thickness):
+    """ Per-unit stock label: item name, color and thickness, with a QR code of the item id. """
+    width, height = LABEL_SIZE
+    img = Image.new('RGB', LABEL_SIZE, color=(255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([10, 10, width-10, height-10], outline=(30, 58, 138), width=15)
+
+    qr = qr_image(str(item_id), 420); qx = width - qr.size[0] - 45
+    img.paste(qr, (qx, 45))
+    draw.text((qx + 20, 45 + qr.size[1] + 10), f"ID: {item_id}", font=load_font("arial.ttf", 60), fill=(0, 0, 0))
+
+    text_w = qx - 80
+    draw.text((50, 50), str(name or ""), font=fit_font(draw, str(name or ""), "arial.ttf", 90, text_w), fill=(0, 0, 0))
+    draw.text((50, 170), str(color or ""), font=fit_font(draw, str(color or ""), "arial.ttf", 70, text_w), fill=(80, 80, 80))
+    draw.text((50, height - 360), str(thickness), font=load_font("arial.ttf", 300), fill=(220, 38, 38))
+    return img
+
+def render_label_batch(labels):
+    """ Worker entry point: [(item_id, name, color, thickness)] -> [FPDF image resource]. """
+    return [pil_image_info(create_item_label(*l)) for l in labels]
+
+def generate_label_pdf(rendered, runs):
+    """ Pack labels 9 per A4 landscape sheet (sticker grid). rendered maps each
+    unique label to its image resource; runs is [(label, count)] in print order.
+    Each unique label is embedded once and referenced from every cell. """
+    pdf = FPDF('L', 'mm', 'A4')
+    pdf.set_auto_page_break(False)
+    names = {}
+    for n, (label, info) in enumerate(rendered.items(), 1):
+        names[label] = f"label{n}"; pdf.images[names[label]] = dict(info, i=n)
+    margin_x = 10; margin_y = 10
+    sticker_w = 92; sticker_h = 63
+    slot = 0
+    for label, count in runs:
+        for _ in range(count):
+            if slot % 9 == 0: pdf.add_page()
+            i, j = divmod(slot % 9, 3)
+            pdf.image(names[label], x=margin_x + (j * sticker_w), y=margin_y + (i * sticker_h), w=sticker_w, h=sticker_h)
+            slot += 1
+    return pdf_to_bytes(pdf)
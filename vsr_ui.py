@@ -0,0 +1,249 @@
+""" Streamlit helpers shared by the page modules: the paginated grid, the
+invoice render cache, the bulk / report exports and the label pools. """
+import streamlit as st
+import pandas as pd
+import os
+import re
+import sqlite3
+import hashlib
+import importlib
+import tempfile
+import threading
+import time
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict, deque
+from itertools import islice
+from vsr_assets import ASSETS, read_bytes
+from vsr_db import run_query, safe_get, get_setting
+
+# --- UI: PAGINATED GRID ---
+def grid_page(base_sql, params, where, sort, desc, last, page_size, key_col='id', count_cap=None):
+    """ One keyset page of `base_sql`: (total matching rows, page rows, has_next).
+    `where` is a list of SQL conditions bound by `params`; `last` is the
+    (sort value, key) cursor of the previous page, or None for page 1.
+    With `count_cap` the count stops at cap + 1 rows instead of scanning all. """
+    w = " AND ".join(where) or "1=1"
+    limit = f" LIMIT {int(count_cap) + 1}" if count_cap else ""
+    total = safe_get(run_query(f"SELECT COUNT(*) FROM (SELECT 1 FROM ({base_sql}) WHERE {w}{limit})", tuple(params), fetch=True))
+    # Keyset on (sort column, key) so the sort column's index can serve the page.
+    # SQLite sorts NULLs first ascending / last descending, hence the IS NULL arms.
+    sc = f'"{sort}"'; kc = f'"{key_col}"'
+    if last is None: kw, kp = "", ()
+    elif last[0] is None:
+        kw, kp = (f" AND {sc} IS NULL AND {kc} < ?", (last[1],)) if desc else (f" AND ({sc} IS NOT NULL OR {kc} > ?)", (last[1],))
+    else:
+        kw, kp = (f" AND (({sc}, {kc}) < (?, ?) OR {sc} IS NULL)", last) if desc else (f" AND ({sc}, {kc}) > (?, ?)", last)
+    dirn = "DESC" if desc else "ASC"
+    rows = run_query(f"SELECT * FROM ({base_sql}) WHERE {w}{kw} ORDER BY {sc} {dirn}, {kc} {dirn} LIMIT ?",
+                     tuple(params) + tuple(kp) + (page_size + 1,), fetch=True)
+    return total, rows[:page_size], len(rows) > page_size
+
+def data_grid(key, base_sql, params=(), labels=None, filter_cols=(), sort_cols=None, sort_col='id', descending=True,
+              page_size=50, decorate=None, column_config=None, select_label="Select ID", select_key=None, key_col='id', count_cap=None):
+    """ Table over `base_sql` (any SELECT exposing a unique `key_col`, `id` by
+    default) that pushes column filters, sorting and keyset pagination into SQL,
+    so only one page is ever fetched. `decorate(rows)` may add columns for just
+    the visible page. Returns the key picked in the selectbox (None when nothing matches). """
+    ss = st.session_state
+    labels = labels or {}
+    sort_cols = sort_cols or [sort_col]
+    name = lambda c: labels.get(c, c)
+
+    fcols = st.columns(len(filter_cols) + 2)
+    where, wp = [], []
+    for fc, col in zip(fcols, filter_cols):
+        v = fc.text_input(f"Filter {name(col)}", key=f"grid_{key}_f_{col}", help="Matches anywhere in the value; start with = for an exact match (can use an index)")
+        if v.startswith("="): where.append(f'"{col}" = ?'); wp.append(v[1:])
+        elif v: where.append(f'CAST("{col}" AS TEXT) LIKE ?'); wp.append(f"%{v}%")
+    sort = fcols[-2].selectbox("Sort by", sort_cols, index=sort_cols.index(sort_col), format_func=name, key=f"grid_{key}_sort")
+    desc = fcols[-1].toggle("Newest / largest first", value=descending, key=f"grid_{key}_desc")
+
+    # Stack of page-start cursors; a new filter/sort starts again at page 1
+    sig = (tuple(wp), sort, desc)
+    if ss.get(f"grid_{key}_sig") != sig: ss[f"grid_{key}_sig"] = sig; ss[f"grid_{key}_pages"] = [None]
+    pages = ss[f"grid_{key}_pages"]
+
+    total, rows, has_next = grid_page(base_sql, tuple(params) + tuple(wp), where, sort, desc, pages[-1], page_size, key_col, count_cap)
+    data = [dict(r) for r in rows]
+    if decorate and data: data = decorate(data)
+
+    if data:
+        st.dataframe(pd.DataFrame(data).rename(columns=labels), hide_index=True, use_container_width=True, column_config=column_config)
+    else: st.info("No matching rows.")
+    first = (len(pages) - 1) * page_size
+    n1, n2, n3 = st.columns([1, 2, 1])
+    if n1.button("◀ Prev", key=f"grid_{key}_prev", disabled=len(pages) == 1): pages.pop(); st.rerun()
+    n2.caption(f"Rows {first + 1 if data else 0}–{first + len(data)} of " + (f"{count_cap:,}+" if count_cap and total > count_cap else f"{total:,}"))
+    if n3.button("Next ▶", key=f"grid_{key}_next", disabled=not has_next):
+        pages.append((rows[-1][sort], rows[-1][key_col])); st.rerun()
+    if not data or not select_label: return None
+    return st.selectbox(select_label, [d[key_col] for d in data], key=select_key or f"grid_{key}_sel")
+
+# --- PDF GENERATORS ---
+class RenderCache:
+    """ Thread-safe LRU of rendered documents keyed by content hash, capped by
+    entry count and total bytes. """
+    def __init__(self, max_entries=64, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries; self.max_bytes = max_bytes
+        self.hits = 0; self.misses = 0; self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, render):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1; self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+        val = render()
+        with self._lock:
+            if key not in self._data:
+                self._data[key] = val; self.size += len(val)
+            while self._data and (len(self._data) > self.max_entries or self.size > self.max_bytes):
+                _, old = self._data.popitem(last=False); self.size -= len(old)
+        return val
+
+@st.cache_resource
+def get_render_cache():
+    return RenderCache()
+
+def content_key(*parts):
+    """ Stable SHA-256 over plain values / sqlite Rows, for render cache keys. """
+    norm = [dict(p) if isinstance(p, sqlite3.Row) else [dict(x) if isinstance(x, sqlite3.Row) else x for x in p] if isinstance(p, list) else p for p in parts]
+    return hashlib.sha256(repr(norm).encode()).hexdigest()
+
+def render_invoice(sale, items, customer):
+    """ Invoice PDF bytes, re-rendered only when the sale, its lines, the
+    customer, the business settings or the logo change. """
+    gst, addr, phone = get_setting('gst_number'), get_setting('business_address'), get_setting('business_contact')
+    key = content_key("invoice", sale, items, customer, gst, addr, phone, ASSETS.mtime("logo.png"))
+    from vsr_render import create_pdf
+    return get_render_cache().get(key, lambda: create_pdf(sale, items, customer, gst, addr, phone))
+
+# --- DOWNLOAD TEMP FILES ---
+# Invoice ZIPs, report exports and backups are built in the temp dir and kept
+# for download. A session only deletes the file it replaces, so files left by
+# closed tabs are swept once they are older than TEMP_TTL.
+TEMP_KINDS = ("invoices", "export", "backup")
+TEMP_TTL = 6 * 3600  # seconds
+
+def sweep_temp_files(ttl=TEMP_TTL):
+    """ Delete vsr_<kind>_* temp files older than ttl seconds; returns how many. """
+    d = tempfile.gettempdir(); prefixes = tuple(f"vsr_{k}_" for k in TEMP_KINDS)
+    cutoff = time.time() - ttl; n = 0
+    for f in os.listdir(d):
+        if not f.startswith(prefixes): continue
+        p = os.path.join(d, f)
+        try:
+            if os.path.isfile(p) and os.path.getmtime(p) < cutoff: os.remove(p); n += 1
+        except OSError: pass  # gone already, or still open (Windows)
+    return n
+
+def new_temp_file(kind, suffix):
+    """ Empty temp file for a download of `kind` (see TEMP_KINDS); stale ones are swept first. """
+    sweep_temp_files()
+    fd, path = tempfile.mkstemp(prefix=f"vsr_{kind}_", suffix=suffix); os.close(fd)
+    return path
+
+def keep_temp_file(state_key, entry):
+    """ Store (path, ...) in the session, deleting the file it replaces. """
+    prev = st.session_state.get(state_key)
+    if prev and prev[0] != entry[0] and os.path.exists(prev[0]): os.remove(prev[0])
+    st.session_state[state_key] = entry
+
+
+# --- BULK INVOICE EXPORT ---
+RENDER_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+RENDER_CHUNK = 25
+
+@st.cache_resource
+def get_render_pool():
+    """ Pool for bulk rendering, started once per server process. Streamlit runs
+    this script as __main__, which spawn/forkserver workers would re-execute, so
+    worker processes are forked; without fork (Windows) fall back to threads.
+    The server is threaded, so workers only run the vsr_render batch functions,
+    which take their assets as arguments and take no lock another thread may
+    have held at fork time. All workers are forked here, with vsr_render
+    already imported, rather than on demand mid-export. """
+    if "fork" not in multiprocessing.get_all_start_methods(): return ThreadPoolExecutor(max_workers=RENDER_WORKERS)
+    importlib.import_module("vsr_render")
+    pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("fork"))
+    pool.submit(os.getpid).result()  # the first submit forks every worker
+    return pool
+
+def invoice_jobs(d1, d2):
+    """ Every invoice dated d1..d2 as a picklable render job, fetched in three set-based queries. """
+    sales = run_query("SELECT * FROM sales WHERE date BETWEEN ? AND ? ORDER BY id", (d1, d2), fetch=True)
+    lines = {}
+    for r in run_query("""SELECT si.sale_id, i.name, i.color, si.qty, si.price_per_unit FROM sale_items si
+                          JOIN items i ON si.item_id = i.id JOIN sales s ON s.id = si.sale_id
+                          WHERE s.date BETWEEN ? AND ? ORDER BY si.id""", (d1, d2), fetch=True):
+        lines.setdefault(r['sale_id'], []).append({k: r[k] for k in ('name', 'color', 'qty', 'price_per_unit')})
+    custs = {r['id']: dict(r) for r in run_query("SELECT * FROM customers WHERE id IN (SELECT customer_id FROM sales WHERE date BETWEEN ? AND ?)", (d1, d2), fetch=True)}
+    gst, addr, phone = get_setting('gst_number'), get_setting('business_address'), get_setting('business_contact')
+    return [(dict(s), lines.get(s['id'], []), custs.get(s['customer_id']), gst, addr, phone) for s in sales]
+
+def export_invoices_zip(jobs, out, progress=None):
+    """ Render jobs in the pool and stream each PDF into a ZIP at `out`. Only a
+    couple of chunks per worker are in flight, so memory stays flat however
+    long the range is. Returns throughput in invoices/sec. """
+    from vsr_render import invoice_logo, render_invoice_batch
+    pool = get_render_pool(); chunks = iter([jobs[i:i + RENDER_CHUNK] for i in range(0, len(jobs), RENDER_CHUNK)])
+    logo = invoice_logo()  # looked up here: workers must not touch ASSETS
+    pending = deque(pool.submit(render_invoice_batch, c, logo) for c in islice(chunks, RENDER_WORKERS * 2))
+    t0 = time.perf_counter(); done = 0
+    try:
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+            while pending:
+                for sid, data in pending.popleft().result():
+                    zf.writestr(f"invoice_{sid}.pdf", data); done += 1
+                nxt = next(chunks, None)
+                if nxt: pending.append(pool.submit(render_invoice_batch, nxt, logo))
+                if progress: progress(done, len(jobs), done / max(time.perf_counter() - t0, 1e-6))
+    except BrokenProcessPool:
+        get_render_pool.clear(); raise
+    finally:
+        for f in pending: f.cancel()
+    return done / max(time.perf_counter() - t0, 1e-6)
+
+
+# --- REPORT EXPORT ---
+def export_panel(key, sql, params, base_name):
+    """ Format picker + button that streams a report query to a temp file, then
+    offers it for download. The file is read only when the download is clicked;
+    the previous export of this panel is removed. """
+    from vsr_export import EXPORT_FORMATS, EXPORT_MIME, export_query
+    c1, c2 = st.columns([2, 1])
+    ext = EXPORT_FORMATS[c1.selectbox("Format", list(EXPORT_FORMATS), key=f"{key}_fmt")]
+    state = f"{key}_export"
+    if c2.button("Export", key=f"{key}_go", use_container_width=True):
+        note = st.empty(); note.caption("Exporting...")
+        path = new_temp_file("export", ext)
+        try: n, secs = export_query(sql, params, ext, path, lambda n, r: note.caption(f"{n:,} rows · {r:,.0f} rows/sec"))
+        except Exception as e:
+            os.remove(path); note.empty(); st.error(f"Export failed: {e}")
+        else:
+            note.empty(); keep_temp_file(state, (path, base_name + ext, n, n / max(secs, 1e-6)))
+    ex = st.session_state.get(state)
+    if ex and os.path.exists(ex[0]):
+        st.caption(f"{ex[2]:,} rows · {ex[3]:,.0f} rows/sec · {os.path.getsize(ex[0]) / 1024:,.0f} KB")
+        ext = os.path.splitext(ex[1])[1]
+        st.download_button(f"⬇️ Download {ex[1]}", data=lambda p=ex[0]: read_bytes(p), file_name=ex[1], mime=EXPORT_MIME[ext], key=f"{key}_dl")
+
+
+# --- ITEM LABEL BATCHES ---
+def default_thickness(name):
+    """ Thread thickness from item names like 'Thread_6_Big'; blank if none. """
+    m = re.search(r"\d+", str(name or "")); return m.group(0) if m else ""
+
+def render_labels(labels):
+    """ Render each unique label once, split across the pool. Returns {label: image resource}. """
+    from vsr_render import render_label_batch
+    labels = list(dict.fromkeys(labels)); size = max(1, -(-len(labels) // RENDER_WORKERS))
+    try: infos = [x for batch in get_render_pool().map(render_label_batch, [labels[i:i + size] for i in range(0, len(labels), size)]) for x in batch]
+    except BrokenProcessPool:
+        get_render_pool.clear(); raise
+    return dict(zip(labels, infos))